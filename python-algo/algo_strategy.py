@@ -43,6 +43,9 @@ class AlgoStrategy(gamelib.AlgoCore):
         SP = 0
         # This is a good place to do initial setup
         self.scored_on_locations = []
+        # Precompute empty board paths so early turns need no pathfinding work
+        self.warm_up_pathing()
+        # For heavy searches, self.start_worker_pool() starts processes that self.worker_pool.map can use during turns
 
     def on_turn(self, turn_state):
         """
@@ -52,7 +55,7 @@ class AlgoStrategy(gamelib.AlgoCore):
         unit deployments, and transmitting your intended deployments to the
         game engine.
         """
-        game_state = gamelib.GameState(self.config, turn_state)
+        game_state = gamelib.GameState(self.config, turn_state, self.path_cache)
         gamelib.debug_write('Performing turn {} of your custom algo strategy'.format(game_state.turn_number))
         game_state.suppress_warnings(True)  #Comment or remove this line to enable warnings.
 
@@ -183,13 +186,16 @@ class AlgoStrategy(gamelib.AlgoCore):
         estimate the path's damage risk.
         """
         damages = []
+        # The damage map counts the enemy turrets that can attack each tile, so it only has to be built once
+        damage_map = game_state.get_damage_map(0)
+        turret_damage = gamelib.GameUnit(TURRET, game_state.config).damage_i
         # Get the damage estimate each path will take
         for location in location_options:
             path = game_state.find_path_to_edge(location)
             damage = 0
             for path_location in path:
                 # Get number of enemy turrets that can attack each location and multiply by turret damage
-                damage += len(game_state.get_attackers(path_location, 0)) * gamelib.GameUnit(TURRET, game_state.config).damage_i
+                damage += damage_map.get_attacker_count(path_location) * turret_damage
             damages.append(damage)
         
         # Now just return the location that takes the least damage
@@ -197,11 +203,10 @@ class AlgoStrategy(gamelib.AlgoCore):
 
     def detect_enemy_unit(self, game_state, unit_type=None, valid_x = None, valid_y = None):
         total_units = 0
-        for location in game_state.game_map:
-            if game_state.contains_stationary_unit(location):
-                for unit in game_state.game_map[location]:
-                    if unit.player_index == 1 and (unit_type is None or unit.unit_type == unit_type) and (valid_x is None or location[0] in valid_x) and (valid_y is None or location[1] in valid_y):
-                        total_units += 1
+        # The map indexes units by owner and type, so only the enemy's units are visited
+        for location in game_state.game_map.get_unit_locations(1, unit_type):
+            if game_state.contains_stationary_unit(location) and (valid_x is None or location[0] in valid_x) and (valid_y is None or location[1] in valid_y):
+                total_units += 1
         return total_units
         
     def filter_blocked_locations(self, locations, game_state):
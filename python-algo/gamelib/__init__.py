@@ -14,7 +14,21 @@ The AlgoCore class in algocore.py handles communication with the game engine, an
 Investigating it is useful for advanced players interested in getting data from the action phase or communicating directly with the game engine. \n
 
 The Navigation class in navigation.py contains functions related to pathfinding, which are used by GameState in pathing related functions. 
-Investigating it is useful for advanced player who want to optimize the slow default pathing algorithm we provide. \n 
+Investigating it is useful for advanced player who want to optimize the slow default pathing algorithm we provide. 
+It also contains FlatPathFinder, a faster backend with identical results that can be selected with GameState.set_pathfinder. \n 
+
+graph_analysis.py finds choke points, the minimum cuts and separating tiles between spawn edges and the edges units target. \n
+
+damage.py contains DamageMap, the damage per frame enemy structures deal on each tile, used to score paths quickly. \n
+
+maze.py contains MazeOptimizer, which searches for wall placements that lengthen enemy paths or their exposure to turrets. \n
+
+workers.py contains WorkerPool, a pool of processes started once per game with AlgoCore.start_worker_pool. 
+It maps functions over many hypothetical boards in parallel during a turn. \n
+
+benchmarks.py times pathfinding on generated boards. Run it with python3 -m gamelib.benchmarks \n
+
+conformance.py checks a pathfinder against the moves recorded in replays. Run it with python3 -m gamelib.conformance \n
 
 util.py contains a small handful of functions that help with communication, including the debug-printing function, debug_write().
 """
@@ -25,5 +39,5 @@ from .game_state import GameState
 from .unit import GameUnit
 from .game_map import GameMap
 
-__all__ = ["algocore", "game_state", "game_map", "navigation", "unit", "util"]
+__all__ = ["algocore", "benchmarks", "conformance", "damage", "game_state", "game_map", "navigation", "graph_analysis", "maze", "unit", "util", "workers"]
  
\ No newline at end of file
@@ -1,6 +1,9 @@
 import json
 
 from .game_state import GameState
+from .game_map import GameMap
+from .navigation import PathCache
+from .workers import WorkerPool
 from .util import get_command, debug_write, BANNER_TEXT, send_command
 
 class AlgoCore(object):
@@ -10,10 +13,16 @@ class AlgoCore(object):
 
     Attributes :
         * config (JSON): json object containing information about the game
+        * path_cache (:obj: PathCache): A cache of paths and flow fields that lives as long as the algo.
+          Pass it to each GameState, GameState(self.config, turn_state, self.path_cache), to reuse work from earlier turns
+          whenever the structure layout, or its mirror image, repeats
+        * worker_pool (:obj: WorkerPool): The pool started by start_worker_pool, or None
 
     """
     def __init__(self):
         self.config = None
+        self.path_cache = PathCache()
+        self.worker_pool = None
 
     def on_game_start(self, config):
         """
@@ -23,6 +32,30 @@ class AlgoCore(object):
         """
         self.config = config
 
+    def warm_up_pathing(self):
+        """
+        Optional start of game setup for pathfinding. Call it from on_game_start after setting self.config. \n
+        It precomputes the idealness tables and empty board paths for every edge into self.path_cache.
+        """
+        self.path_cache.warm_up(GameMap(self.config))
+
+    def start_worker_pool(self, processes=None):
+        """
+        Optional start of game setup for parallel search. Call it from on_game_start after setting self.config. \n
+        It starts self.worker_pool, processes that each hold the config and a warmed up PathCache for the whole game,
+        so during a turn self.worker_pool.map(function, boards) can evaluate many hypothetical boards on every core.
+        The pool is stopped when the game ends.
+        """
+        self.worker_pool = WorkerPool(self.config, processes)
+
+    def stop_worker_pool(self):
+        """
+        Stops self.worker_pool, if it was started
+        """
+        if self.worker_pool is not None:
+            self.worker_pool.close()
+            self.worker_pool = None
+
     def on_turn(self, game_state):
         """
         This step function is called at the start of each turn.
@@ -82,6 +115,7 @@ class AlgoCore(object):
                     This is the end game message. This means the game is over so break and finish the program.
                     """
                     debug_write("Got end state, game over. Stopping algo.")
+                    self.stop_worker_pool()
                     break
                 else:
                     """
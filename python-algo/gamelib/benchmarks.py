@@ -0,0 +1,199 @@
+"""
+Benchmarks for pathfinding, to catch performance regressions before they reach a ranked game.
+Run them from the python-algo folder with
+
+    python3 -m gamelib.benchmarks
+
+Boards are generated with structures on 0% to 60% of the tiles, and paths are found from many start locations on each.
+For each pathfinding variant the per-call latency percentiles are reported, along with the memory allocated per call
+as measured by tracemalloc. Use --help to see the options.
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+from .game_state import GameState, EMPTY_TURN
+from .navigation import ShortestPathFinder, FlatPathFinder, ScratchPathFinder, FlowField, PathCache
+
+DENSITIES = [0.0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6]
+
+def make_board(config, density, seed):
+    """Makes a GameState with walls on a random fraction of the tiles
+
+    Args:
+        * config (JSON): A json object containing information about the game
+        * density: The fraction of tiles to place walls on
+        * seed: The seed for choosing tiles
+
+    Returns:
+        A GameState with a fresh PathCache
+
+    """
+    game_state = GameState(config, EMPTY_TURN, PathCache())
+    game_state.suppress_warnings(True)
+    wall = config["unitInformation"][0]["shorthand"]
+    rng = random.Random(seed)
+    for location in game_state.game_map:
+        if rng.random() < density:
+            game_state.game_map.add_unit(wall, location, 0 if location[1] < game_state.HALF_ARENA else 1)
+    return game_state
+
+def _pathfinder_variant(pathfinder_class):
+    """A variant that finds every path with a new pathfinder of the given class, without any caching
+
+    """
+    def setup(game_state, starts):
+        pathfinder = pathfinder_class()
+        edges = game_state.game_map.get_edges()
+        return [(lambda start=start: pathfinder.navigate_multiple_endpoints(start, edges[game_state.get_target_edge(start)], game_state))
+                for start in starts]
+    return setup
+
+def _find_path_to_edge(game_state, starts):
+    return [(lambda start=start: game_state.find_path_to_edge(start)) for start in starts]
+
+def _find_path_to_edge_cached(game_state, starts):
+    for start in starts:
+        game_state.find_path_to_edge(start)
+    return [(lambda start=start: game_state.find_path_to_edge(start)) for start in starts]
+
+def _flow_field(game_state, starts):
+    edges = game_state.game_map.get_edges()
+    layout_key = game_state.game_map.get_layout_key()
+    flow_fields = {}
+    def get_path(start):
+        target_edge = game_state.get_target_edge(start)
+        if target_edge not in flow_fields:
+            flow_fields[target_edge] = FlowField(layout_key, edges[target_edge])
+        return flow_fields[target_edge].get_path(start)
+    return [(lambda start=start: get_path(start)) for start in starts]
+
+def _find_paths_from_edges(game_state, starts):
+    return [lambda: game_state.find_paths_from_edges(list(range(4)))]
+
+#Each variant takes a freshly generated board and the start locations, and returns the calls to measure.
+#Setup work done before returning, such as filling a cache, is not measured.
+VARIANTS = {
+    "shortest_path_finder": _pathfinder_variant(ShortestPathFinder),
+    "flat_path_finder": _pathfinder_variant(FlatPathFinder),
+    "scratch_path_finder": _pathfinder_variant(ScratchPathFinder),
+    "find_path_to_edge": _find_path_to_edge,
+    "find_path_to_edge_cached": _find_path_to_edge_cached,
+    "flow_field": _flow_field,
+    "find_paths_from_edges": _find_paths_from_edges,
+}
+
+def run_benchmarks(config, densities=DENSITIES, boards=2, starts=25, variants=None, seed=0, measure_allocations=True):
+    """Runs the benchmarks
+
+    Args:
+        * config (JSON): A json object containing information about the game
+        * densities: The structure densities to generate boards at
+        * boards: The number of boards generated at each density
+        * starts: The number of start locations sampled on each board
+        * variants: A list of names from VARIANTS to run, all of them if None
+        * seed: The seed for generating boards and sampling starts
+        * measure_allocations: If True, each call is run a second time under tracemalloc to measure allocations
+
+    Returns:
+        A list with a dict of results for each variant and density, with the number of calls, the 50th, 90th and 99th
+        percentile and maximum latency in microseconds, and the mean and maximum bytes allocated per call
+
+    """
+    if variants is None:
+        variants = list(VARIANTS)
+    results = []
+    for name in variants:
+        for density in densities:
+            latencies = []
+            allocations = []
+            for board in range(boards):
+                board_seed = (seed * 1000 + int(density * 100)) * 1000 + board
+                rng = random.Random(board_seed)
+                game_state = make_board(config, density, board_seed)
+                open_locations = [location for location in game_state.game_map if not game_state.contains_stationary_unit(location)]
+                board_starts = rng.sample(open_locations, min(starts, len(open_locations)))
+                for call in VARIANTS[name](game_state, board_starts):
+                    start_time = time.perf_counter()
+                    call()
+                    latencies.append((time.perf_counter() - start_time) * 1e6)
+
+                if measure_allocations:
+                    #A fresh board, so calls allocate as much as they did when timed
+                    game_state = make_board(config, density, board_seed)
+                    tracemalloc.start()
+                    for call in VARIANTS[name](game_state, board_starts):
+                        tracemalloc.reset_peak()
+                        baseline = tracemalloc.get_traced_memory()[0]
+                        call()
+                        allocations.append(tracemalloc.get_traced_memory()[1] - baseline)
+                    tracemalloc.stop()
+
+            latencies.sort()
+            results.append({
+                "variant": name,
+                "density": density,
+                "calls": len(latencies),
+                "p50": _percentile(latencies, 50),
+                "p90": _percentile(latencies, 90),
+                "p99": _percentile(latencies, 99),
+                "max": latencies[-1] if latencies else 0,
+                "mean_bytes": sum(allocations) / len(allocations) if allocations else None,
+                "max_bytes": max(allocations) if allocations else None,
+            })
+    return results
+
+def _percentile(sorted_values, percent):
+    """The nearest rank percentile of a sorted list
+
+    """
+    if not sorted_values:
+        return 0
+    rank = math.ceil(percent / 100 * len(sorted_values)) - 1
+    return sorted_values[max(0, rank)]
+
+def format_results(results):
+    """Formats results from run_benchmarks as a table
+
+    """
+    lines = ["{:<26} {:>7} {:>6} {:>10} {:>10} {:>10} {:>10} {:>12} {:>12}".format(
+        "variant", "density", "calls", "p50 us", "p90 us", "p99 us", "max us", "mean KiB", "max KiB")]
+    for result in results:
+        mean_kib = "-" if result["mean_bytes"] is None else "{:.1f}".format(result["mean_bytes"] / 1024)
+        max_kib = "-" if result["max_bytes"] is None else "{:.1f}".format(result["max_bytes"] / 1024)
+        lines.append("{:<26} {:>7.0%} {:>6} {:>10.1f} {:>10.1f} {:>10.1f} {:>10.1f} {:>12} {:>12}".format(
+            result["variant"], result["density"], result["calls"], result["p50"], result["p90"], result["p99"], result["max"], mean_kib, max_kib))
+    return "\n".join(lines)
+
+def main(argv=None):
+    default_config = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "game-configs.json")
+    parser = argparse.ArgumentParser(description="Benchmark pathfinding on generated boards")
+    parser.add_argument("--config", default=default_config, help="Path to a game config json file")
+    parser.add_argument("--densities", type=float, nargs="+", default=DENSITIES, help="Structure densities to generate boards at")
+    parser.add_argument("--boards", type=int, default=2, help="Boards generated at each density")
+    parser.add_argument("--starts", type=int, default=25, help="Start locations sampled on each board")
+    parser.add_argument("--variants", nargs="+", choices=list(VARIANTS), help="Variants to run, all of them by default")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for generating boards")
+    parser.add_argument("--json", action="store_true", help="Print the results as json instead of a table")
+    parser.add_argument("--no-allocations", action="store_true", help="Skip measuring allocations with tracemalloc")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.config):
+        parser.error("Config file {} not found, pass one with --config".format(args.config))
+    with open(args.config) as config_file:
+        config = json.load(config_file)
+
+    results = run_benchmarks(config, args.densities, args.boards, args.starts, args.variants, args.seed, not args.no_allocations)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(format_results(results))
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,214 @@
+"""
+Checks a pathfinder against the movement recorded in .replay files, to prove that a faster pathfinding backend
+still predicts exactly what the game engine does. Run it from the python-algo folder with
+
+    python3 -m gamelib.conformance replays/*.replay
+
+A replay has one json object per line: the game config, then the state of every frame (see json-docs.html).
+For each move event the structures on the board the frame before are rebuilt, and the pathfinder's next tile
+for the unit is compared with the tile it moved to. Use --help to see the options.
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from .game_state import GameState, EMPTY_TURN
+from .navigation import ShortestPathFinder, FlatPathFinder, ScratchPathFinder, HORIZONTAL, VERTICAL
+
+PATHFINDERS = {
+    "shortest": ShortestPathFinder,
+    "flat": FlatPathFinder,
+    "scratch": ScratchPathFinder,
+}
+
+
+class ConformanceReport:
+    """The results of checking a pathfinder against replays
+
+    Attributes :
+        * moves_checked (int): The number of move events compared with a prediction
+        * paths_computed (int): The number of paths the pathfinder found
+        * seconds (float): The time spent finding paths
+        * mismatches (list): A dict for each move the pathfinder got wrong, with the replay, turn, frame, unit id,
+          the location the unit moved from, the location it moved to and the predicted location (None if it was predicted to stop)
+
+    """
+    def __init__(self):
+        self.moves_checked = 0
+        self.paths_computed = 0
+        self.seconds = 0.0
+        self.mismatches = []
+
+    def paths_per_second(self):
+        """The number of paths found per second of pathfinding
+
+        """
+        return self.paths_computed / self.seconds if self.seconds > 0 else 0.0
+
+    def merge(self, other):
+        """Adds the results of another report to this one
+
+        """
+        self.moves_checked += other.moves_checked
+        self.paths_computed += other.paths_computed
+        self.seconds += other.seconds
+        self.mismatches.extend(other.mismatches)
+
+    def summary(self):
+        """A one line description of the results
+
+        """
+        return "{} moves checked, {} mismatches, {} paths in {:.3f}s ({:.0f} paths/s)".format(
+            self.moves_checked, len(self.mismatches), self.paths_computed, self.seconds, self.paths_per_second())
+
+
+def read_replay(lines):
+    """Splits the lines of a replay into its config and frames
+
+    Args:
+        lines: An iterable of the lines of a .replay file
+
+    Returns:
+        The config, or None if the replay has none, and a list of the frames in order
+
+    """
+    config = None
+    frames = []
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        data = json.loads(line)
+        if "turnInfo" in data:
+            frames.append(data)
+        elif "unitInformation" in data:
+            config = data
+    return config, frames
+
+def check_replay(lines, pathfinder=None, config=None, name="replay"):
+    """Checks the next tile a pathfinder predicts for every move event in a replay
+
+    A unit's path is found when it first moves, and found again from its current location whenever the structures
+    on the board change. Otherwise its next tile is the next tile of the path it is following, like a unit in the engine.
+    A path found again keeps breaking ties the way the unit's last move does, the same assumption PathTracker makes.
+
+    Args:
+        * lines: An iterable of the lines of a .replay file
+        * pathfinder: An object with a navigate_multiple_endpoints(start_point, end_points, game_state, previous_move_direction) method. A ShortestPathFinder if None
+        * config: The game config, used if the replay does not contain one
+        * name: The name used for the replay in mismatches
+
+    Returns:
+        A ConformanceReport
+
+    """
+    replay_config, frames = read_replay(lines)
+    config = replay_config or config
+    if config is None:
+        raise ValueError("{} has no config, pass one with config".format(name))
+    if pathfinder is None:
+        pathfinder = ShortestPathFinder()
+
+    report = ConformanceReport()
+    game_state = GameState(config, EMPTY_TURN)
+    game_state.suppress_warnings(True)
+    game_map = game_state.game_map
+    unit_information = config["unitInformation"]
+    structure_indices = [i for i in range(6) if unit_information[i].get("unitCategory") == 0]
+
+    structures = {}
+    target_edges = {}
+    followed_paths = {}
+    move_directions = {}
+    previous_frame = None
+    for frame in frames:
+        if previous_frame is not None and frame["turnInfo"][0] == 1:
+            layout = _structures_in_frame(previous_frame, structure_indices, unit_information)
+            for spawn in frame.get("events", {}).get("spawn", []):
+                if spawn[1] in structure_indices:
+                    layout[tuple(spawn[0])] = (unit_information[spawn[1]]["shorthand"], spawn[3] - 1)
+            if layout != structures:
+                _apply_layout(game_map, structures, layout)
+                structures = layout
+                followed_paths.clear()
+
+            for spawn in frame.get("events", {}).get("spawn", []):
+                target_edges[spawn[2]] = game_state.get_target_edge(spawn[0])
+            for move in frame.get("events", {}).get("move", []):
+                start, end, unit_id = move[0], move[1], move[4]
+                if unit_id not in target_edges:
+                    target_edges[unit_id] = game_state.get_target_edge(start)
+                path = followed_paths.get(unit_id)
+                if path is None or list(start) not in path:
+                    begin = time.perf_counter()
+                    path = pathfinder.navigate_multiple_endpoints(list(start), game_map.get_edge_locations(target_edges[unit_id]), game_state,
+                                                                  move_directions.get(unit_id, 0))
+                    report.seconds += time.perf_counter() - begin
+                    report.paths_computed += 1
+                    followed_paths[unit_id] = path
+                position = path.index(list(start))
+                predicted = path[position + 1] if position + 1 < len(path) else None
+                report.moves_checked += 1
+                if predicted != list(end):
+                    report.mismatches.append({"replay": name, "turn": frame["turnInfo"][1], "frame": frame["turnInfo"][2],
+                                              "unit": unit_id, "start": list(start), "observed": list(end), "predicted": predicted})
+                    #Follow the unit from where it really is
+                    followed_paths.pop(unit_id, None)
+                if list(start) != list(end):
+                    move_directions[unit_id] = VERTICAL if start[0] == end[0] else HORIZONTAL
+        previous_frame = frame
+    return report
+
+def _structures_in_frame(frame, structure_indices, unit_information):
+    """The structures in a frame, as a dict mapping (x, y) to (unit type, player index)
+
+    """
+    layout = {}
+    for player_index, key in enumerate(["p1Units", "p2Units"]):
+        units = frame.get(key, [])
+        for i in structure_indices:
+            if i < len(units):
+                for unit in units[i]:
+                    layout[(int(unit[0]), int(unit[1]))] = (unit_information[i]["shorthand"], player_index)
+    return layout
+
+def _apply_layout(game_map, old_layout, new_layout):
+    """Updates the structures on game_map from old_layout to new_layout
+
+    """
+    for location in old_layout:
+        if location not in new_layout:
+            game_map.remove_unit(list(location))
+    for location, (unit_type, player_index) in new_layout.items():
+        if old_layout.get(location) != (unit_type, player_index):
+            game_map.remove_unit(list(location))
+            game_map.add_unit(unit_type, list(location), player_index)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check a pathfinder against the movement recorded in replays")
+    parser.add_argument("replays", nargs="+", help="Paths to .replay files")
+    parser.add_argument("--pathfinder", choices=list(PATHFINDERS), default="shortest", help="The pathfinder to check")
+    parser.add_argument("--config", help="Path to a game config json file, for replays without one")
+    parser.add_argument("--show", type=int, default=20, help="The number of mismatches to print")
+    args = parser.parse_args(argv)
+
+    config = None
+    if args.config:
+        with open(args.config) as config_file:
+            config = json.load(config_file)
+
+    total = ConformanceReport()
+    for replay in args.replays:
+        with open(replay) as replay_file:
+            report = check_replay(replay_file, PATHFINDERS[args.pathfinder](), config, replay)
+        print("{}: {}".format(replay, report.summary()))
+        total.merge(report)
+    for mismatch in total.mismatches[:args.show]:
+        print("Mismatch in {replay} turn {turn} frame {frame}: unit {unit} moved {start} -> {observed}, predicted {predicted}".format(**mismatch))
+    print("Total: {}".format(total.summary()))
+    return 1 if total.mismatches else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,110 @@
+import math
+
+from .navigation import ARENA_SIZE, NUM_CELLS, IN_BOUNDS, MIRROR_INDEX, range_stencil
+
+class DamageMap:
+    """The damage per frame a player's mobile units would take on each tile from the enemy structures in range
+
+    A tile is covered by a structure when the structure could attack a unit there, using the same range rule as
+    GameState.get_attackers. Unlike get_attackers, enemy mobile units are never counted. The map is built once for a structure layout, after which the damage along any
+    path is a sum of list lookups instead of a get_attackers call per tile.
+
+    Attributes :
+        * player_index (int): The player whose mobile units take the damage, 0 for you 1 for the enemy
+        * attackers (tuple): The (x, y, damage_i, attackRange) of each enemy structure that can attack
+        * damage (list): The damage per frame at each flat index x * 28 + y
+        * attacker_counts (list): The number of structures attacking each flat index
+
+    """
+    def __init__(self, player_index, attackers, max_range, get_hit_radius):
+        """Builds the map from the attacking structures
+
+        Args:
+            * player_index: The player whose mobile units take the damage
+            * attackers: A tuple of (x, y, damage_i, attackRange) for each enemy structure that can attack
+            * max_range: The largest attackRange of any unit type. GameState.get_attackers only checks the locations
+              in this range of a tile, plus get_hit_radius
+            * get_hit_radius: The getHitRadius from the game config
+
+        """
+        self.player_index = player_index
+        self.attackers = attackers
+        self.damage = [0] * NUM_CELLS
+        self.attacker_counts = [0] * NUM_CELLS
+        search_offsets = range_stencil(max_range, get_hit_radius)
+        #The search offsets a structure can attack, for each attack range
+        offsets_in_range = {}
+        for x, y, damage, attack_range in attackers:
+            offsets = offsets_in_range.get(attack_range)
+            if offsets is None:
+                offsets = [(dx, dy) for dx, dy in search_offsets if math.sqrt(dx ** 2 + dy ** 2) <= attack_range]
+                offsets_in_range[attack_range] = offsets
+            for dx, dy in offsets:
+                target_x = x + dx
+                target_y = y + dy
+                if 0 <= target_x < ARENA_SIZE and 0 <= target_y < ARENA_SIZE:
+                    index = target_x * ARENA_SIZE + target_y
+                    if IN_BOUNDS[index]:
+                        self.damage[index] += damage
+                        self.attacker_counts[index] += 1
+
+    def mirror(self):
+        """Gets the damage map for the left to right mirror image of this map's attackers.
+        Attack ranges are symmetric, so this is exact and needs no search.
+
+        """
+        attackers = tuple(sorted((ARENA_SIZE - 1 - x, y, damage, attack_range) for x, y, damage, attack_range in self.attackers))
+        damage_map = DamageMap(self.player_index, (), 0, 0)
+        damage_map.attackers = attackers
+        damage_map.damage = [self.damage[index] for index in MIRROR_INDEX]
+        damage_map.attacker_counts = [self.attacker_counts[index] for index in MIRROR_INDEX]
+        return damage_map
+
+    def get_damage(self, location):
+        """Gets the damage per frame a unit at location would take
+
+        """
+        return self.damage[location[0] * ARENA_SIZE + location[1]]
+
+    def get_attacker_count(self, location):
+        """Gets the number of structures that would attack a unit at location.
+        This is the length of GameState.get_attackers when no enemy mobile units are on the board.
+
+        """
+        return self.attacker_counts[location[0] * ARENA_SIZE + location[1]]
+
+    def score_path(self, path, frames_per_move=1):
+        """Gets the damage a unit would take walking a path
+
+        Args:
+            * path: A list of locations, such as one returned by GameState.find_path_to_edge
+            * frames_per_move: The number of frames the unit spends on each tile, 1 / GameUnit.speed
+
+        Returns:
+            The total damage taken along the path
+
+        """
+        damage = self.damage
+        return sum(damage[x * ARENA_SIZE + y] for x, y in path) * frames_per_move
+
+    def score_paths(self, paths, frames_per_move=1):
+        """Gets the damage a unit would take walking each of a list of paths
+
+        Returns:
+            A list with the total damage taken along each path, see score_path
+
+        """
+        return [self.score_path(path, frames_per_move) for path in paths]
+
+    def score_timed_path(self, timed_path):
+        """Gets the damage a unit would take walking a timed path, using the frames it spends on each tile
+
+        Args:
+            timed_path: A list of [location, arrival_frame, departure_frame], such as one returned by GameState.find_timed_path_to_edge
+
+        Returns:
+            The total damage taken along the path
+
+        """
+        damage = self.damage
+        return sum(damage[location[0] * ARENA_SIZE + location[1]] * (departure - arrival) for location, arrival, departure in timed_path)
@@ -1,6 +1,15 @@
 import math
 from .unit import GameUnit
 from .util import debug_write
+from .navigation import ARENA_SIZE, HALF_ARENA, IN_BOUNDS, range_stencil, mirror_location, mirror_layout_key, mirror_edge
+
+#The (x, y, flat index) of every location on the board, row by row from the bottom, in the order the map iterates over them
+_LOCATIONS = tuple((x, y, x * ARENA_SIZE + y) for y in range(ARENA_SIZE) for x in range(ARENA_SIZE) if IN_BOUNDS[x * ARENA_SIZE + y])
+_MY_HALF = tuple(location for location in _LOCATIONS if location[1] < HALF_ARENA)
+_ENEMY_HALF = tuple(location for location in _LOCATIONS if location[1] >= HALF_ARENA)
+
+#The distance for each squared distance between two locations on the board, (ARENA_SIZE - 1) ** 2 * 2 at most
+_DISTANCES = tuple(math.sqrt(squared_distance) for squared_distance in range(2 * (ARENA_SIZE - 1) ** 2 + 1))
 
 class GameMap:
     """Holds data about the current game map and provides functions
@@ -9,6 +18,10 @@ class GameMap:
     game_map[x, y] will return a list of Units located at that location, 
     or an empty list if there are no units at the location
 
+    The structures are also kept in flat arrays indexed by x * ARENA_SIZE + y, holding the type code, owner,
+    health and upgraded flag of the structure on each location. See get_structure_types and similar functions.
+    The locations of each player's units of each type are indexed too, see get_unit_locations.
+
     Attributes :
         * config (JSON): Contains information about the current game rules
         * enable_warnings (bool): If true, debug messages for game_map functions will print out
@@ -36,7 +49,16 @@ class GameMap:
         self.BOTTOM_LEFT = 2
         self.BOTTOM_RIGHT = 3
         self.__map = self.__empty_grid()
-        self.__start = [13,0]
+        self.__blocked = bytearray(self.ARENA_SIZE * self.ARENA_SIZE)
+        self.__type_codes = {unit_information["shorthand"]: code for code, unit_information in enumerate(config["unitInformation"]) if "shorthand" in unit_information}
+        self.__structure_types = [-1] * (self.ARENA_SIZE * self.ARENA_SIZE)
+        self.__structure_owners = [-1] * (self.ARENA_SIZE * self.ARENA_SIZE)
+        self.__structure_health = [0.0] * (self.ARENA_SIZE * self.ARENA_SIZE)
+        self.__structure_upgraded = bytearray(self.ARENA_SIZE * self.ARENA_SIZE)
+        #Maps (player_index, unit_type) to a dict from flat index to the number of such units there
+        self.__unit_index = {}
+        self.__layout_key = None
+        self.__structure_listeners = []
     
     def __getitem__(self, location):
         if len(location) == 2 and self.in_arena_bounds(location):
@@ -46,26 +68,51 @@ class GameMap:
 
     def __setitem__(self, location, val):
         if type(location) == tuple and len(location) == 2 and self.in_arena_bounds(location):
+            index = location[0] * self.ARENA_SIZE + location[1]
+            for unit in self.__map[location[0]][location[1]]:
+                self.__unindex_unit(unit, index)
             self.__map[location[0]][location[1]] = val
+            for unit in val:
+                self.__index_unit(unit, index)
+            self.__update_blocked(location)
             return
         self._invalid_coordinates(location)
 
     def __iter__(self):
-        self.__start = [13,0]
-        return self
-    
-    def __next__(self):
-        location = self.__start
-        if location == [15,27]:
-            raise StopIteration
-        new_location = [location[0]+1, location[1]]
-        while not self.in_arena_bounds(new_location) and not location == [14,27]:
-            if new_location[0] == self.ARENA_SIZE:
-                new_location = [0, new_location[1]+1]
-            else:
-                new_location = [new_location[0]+1, new_location[1]]
-        self.__start = new_location
-        return location 
+        """Iterates over every location on the board, row by row from the bottom.
+        Each location is a new [x, y] list, and iterations can be nested.
+        """
+        return ([x, y] for x, y, _ in _LOCATIONS)
+
+    def iter_my_half(self):
+        """Iterates over the locations on your half of the board, in the same order as iterating over the map
+        """
+        return ([x, y] for x, y, _ in _MY_HALF)
+
+    def iter_enemy_half(self):
+        """Iterates over the locations on your opponent's half of the board, in the same order as iterating over the map
+        """
+        return ([x, y] for x, y, _ in _ENEMY_HALF)
+
+    def iter_structure_locations(self, player_index=None):
+        """Iterates over the locations that contain a structure, in the same order as iterating over the map
+
+        Args:
+            player_index: Only structures owned by this player are included, 0 for you 1 for the enemy. Both players if None
+        """
+        blocked = self.__blocked
+        owners = self.__structure_owners
+        return ([x, y] for x, y, index in _LOCATIONS if blocked[index] and (player_index is None or owners[index] == player_index))
+
+    def iter_player_locations(self, player_index):
+        """Iterates over the locations that contain at least one unit, structure or mobile, owned by a player,
+        in the same order as iterating over the map
+
+        Args:
+            player_index: The player whose units are looked for, 0 for you 1 for the enemy
+        """
+        grid = self.__map
+        return ([x, y] for x, y, _ in _LOCATIONS if any(unit.player_index == player_index for unit in grid[x][y]))
 
     def __empty_grid(self):
         grid = []
@@ -75,6 +122,67 @@ class GameMap:
                 grid[x].append([])
         return grid
 
+    def __update_blocked(self, location):
+        x, y = location
+        structure = None
+        for unit in self.__map[x][y]:
+            if unit.stationary:
+                structure = unit
+                break
+        self.__set_structure(x * self.ARENA_SIZE + y, structure)
+        self.__set_blocked(x * self.ARENA_SIZE + y, 0 if structure is None else 1)
+
+    def __index_unit(self, unit, index):
+        counts = self.__unit_index.setdefault((unit.player_index, unit.unit_type), {})
+        counts[index] = counts.get(index, 0) + 1
+
+    def __unindex_unit(self, unit, index):
+        counts = self.__unit_index.get((unit.player_index, unit.unit_type))
+        if counts is not None and index in counts:
+            if counts[index] > 1:
+                counts[index] -= 1
+            else:
+                del counts[index]
+
+    def __set_structure(self, index, unit):
+        if unit is None:
+            self.__structure_types[index] = -1
+            self.__structure_owners[index] = -1
+            self.__structure_health[index] = 0.0
+            self.__structure_upgraded[index] = 0
+        else:
+            self.__structure_types[index] = self.__type_codes.get(unit.unit_type, -1)
+            self.__structure_owners[index] = unit.player_index
+            self.__structure_health[index] = unit.health
+            self.__structure_upgraded[index] = 1 if unit.upgraded else 0
+
+    def __set_blocked(self, index, value):
+        if self.__blocked[index] != value:
+            self.__blocked[index] = value
+            self.__layout_key = None
+            location = [index // self.ARENA_SIZE, index % self.ARENA_SIZE]
+            for listener in self.__structure_listeners[:]:
+                listener(location, bool(value))
+
+    def _place_unit(self, unit):
+        """
+        Used internally by game_state to place an already created GameUnit at its x, y location
+        """
+        self.__map[unit.x][unit.y].append(unit)
+        self.__index_unit(unit, unit.x * self.ARENA_SIZE + unit.y)
+        if unit.stationary:
+            self.__set_structure(unit.x * self.ARENA_SIZE + unit.y, unit)
+            self.__set_blocked(unit.x * self.ARENA_SIZE + unit.y, 1)
+
+    def _upgrade_unit(self, unit):
+        """
+        Used internally by game_state to upgrade a GameUnit on the map, keeping the structure arrays up to date
+        """
+        #Upgrading does not change a unit's owner or type, so the unit index needs no update
+        unit.upgrade()
+        if unit.stationary:
+            self.__structure_upgraded[unit.x * self.ARENA_SIZE + unit.y] = 1
+
     def _invalid_coordinates(self, location):
         self.warn("{} is out of bounds.".format(str(location)))
 
@@ -103,6 +211,72 @@ class GameMap:
 
         return bottom_half_check or top_half_check
 
+    def in_arena_bounds_batch(self, locations):
+        """Checks many locations at once against a precomputed mask of the diamond shaped game board.
+        Locations with coordinates between tiles are checked with in_arena_bounds instead.
+
+        Args:
+            locations: A list of map locations
+
+        Returns:
+            A list with True for each location inside the board, False otherwise, agreeing with in_arena_bounds
+
+        """
+        size = self.ARENA_SIZE
+        results = []
+        for location in locations:
+            x, y = location
+            if x != int(x) or y != int(y):
+                results.append(self.in_arena_bounds(location))
+                continue
+            x = int(x)
+            y = int(y)
+            results.append(0 <= x < size and 0 <= y < size and IN_BOUNDS[x * size + y] == 1)
+        return results
+
+    def distance_matrix(self, locations_1, locations_2=None):
+        """Euclidean distances between every pair of locations from two lists, using a precomputed table of square roots
+
+        Args:
+            locations_1: A list of locations
+            locations_2: A second list of locations. locations_1 if None
+
+        Returns:
+            A list with a row for each location in locations_1, holding its distance to each location in locations_2,
+            agreeing with distance_between_locations
+
+        """
+        if locations_2 is None:
+            locations_2 = locations_1
+        integral_1 = self.__integral_locations(locations_1)
+        integral_2 = self.__integral_locations(locations_2)
+        if integral_1 is None or integral_2 is None:
+            #Squared distances to points between tiles are not whole numbers, so there is nothing to look up
+            return [[self.distance_between_locations(location_1, location_2) for location_2 in locations_2] for location_1 in locations_1]
+        locations_1 = integral_1
+        locations_2 = integral_2
+        distances = _DISTANCES
+        limit = len(distances)
+        matrix = []
+        for x1, y1 in locations_1:
+            row = []
+            for x2, y2 in locations_2:
+                squared_distance = (x1 - x2) ** 2 + (y1 - y2) ** 2
+                row.append(distances[squared_distance] if squared_distance < limit else math.sqrt(squared_distance))
+            matrix.append(row)
+        return matrix
+
+    def __integral_locations(self, locations):
+        """The locations as integer (x, y) tuples, or None if any coordinate is between tiles
+
+        """
+        integral = []
+        for x, y in locations:
+            if x != int(x) or y != int(y):
+                return
+            integral.append((int(x), int(y)))
+        return integral
+
     def get_edge_locations(self, quadrant_description):
         """Takes in an edge description and returns a list of locations.
         
@@ -168,10 +342,16 @@ class GameMap:
 
         x, y = location
         new_unit = GameUnit(unit_type, self.config, player_index, None, location[0], location[1])
+        index = x * self.ARENA_SIZE + y
         if not new_unit.stationary:
             self.__map[x][y].append(new_unit)
         else:
+            for unit in self.__map[x][y]:
+                self.__unindex_unit(unit, index)
             self.__map[x][y] = [new_unit]
+            self.__set_structure(index, new_unit)
+            self.__set_blocked(index, 1)
+        self.__index_unit(new_unit, index)
 
     def remove_unit(self, location):
         """Remove all units on the map in the given location.
@@ -186,10 +366,191 @@ class GameMap:
             self._invalid_coordinates(location)
         
         x, y = location
+        for unit in self.__map[x][y]:
+            self.__unindex_unit(unit, x * self.ARENA_SIZE + y)
         self.__map[x][y] = []
+        self.__set_structure(x * self.ARENA_SIZE + y, None)
+        self.__set_blocked(x * self.ARENA_SIZE + y, 0)
+
+    def add_structure_listener(self, listener):
+        """Registers a function to call whenever a location gains its first structure or loses its last one
+
+        Args:
+            listener: A function called as listener(location, blocked), where blocked is False when the structure at location was removed
+
+        """
+        self.__structure_listeners.append(listener)
+
+    def remove_structure_listener(self, listener):
+        """Stops calling a function registered with add_structure_listener
+
+        """
+        if listener in self.__structure_listeners:
+            self.__structure_listeners.remove(listener)
+
+    def get_blocked_mask(self):
+        """Gets the locations blocked by structures as a flat array
+
+        Returns:
+            A bytearray of length ARENA_SIZE * ARENA_SIZE where index x * ARENA_SIZE + y is 1 if [x, y] contains a structure.
+            The array is kept up to date by add_unit, remove_unit and assignment to game_map[x, y], so it should not be modified.
+            Units appended directly to the list returned by game_map[x, y] are not tracked.
+        """
+        return self.__blocked
+
+    def get_structure_types(self):
+        """Gets the type of the structure on each location as a flat array
+
+        Returns:
+            A list of length ARENA_SIZE * ARENA_SIZE where index x * ARENA_SIZE + y is the type code of the structure at [x, y],
+            its index in config["unitInformation"] (see get_type_code), or -1 if there is none.
+            Like get_blocked_mask, it is kept up to date by the functions that change structures and should not be modified.
+        """
+        return self.__structure_types
+
+    def get_structure_owners(self):
+        """Gets the owner of the structure on each location as a flat array
+
+        Returns:
+            A list where index x * ARENA_SIZE + y is the player index of the structure at [x, y], 0 for you 1 for the enemy, or -1 if there is none
+        """
+        return self.__structure_owners
+
+    def get_structure_health(self):
+        """Gets the health of the structure on each location as a flat array
+
+        Returns:
+            A list where index x * ARENA_SIZE + y is the health of the structure at [x, y] when it was placed or parsed, or 0 if there is none.
+            Changes made directly to a unit's health are not tracked.
+        """
+        return self.__structure_health
+
+    def get_structure_upgraded(self):
+        """Gets which structures are upgraded as a flat array
+
+        Returns:
+            A bytearray where index x * ARENA_SIZE + y is 1 if the structure at [x, y] is upgraded
+        """
+        return self.__structure_upgraded
+
+    def get_type_code(self, unit_type):
+        """Gets the code used for a unit type in get_structure_types
+
+        Args:
+            unit_type: A unit type, such as WALL or TURRET
+
+        Returns:
+            The index of the unit type in config["unitInformation"], or -1 if it is not a known unit type
+        """
+        return self.__type_codes.get(unit_type, -1)
+
+    def get_structure_locations(self, unit_type=None, player_index=None):
+        """Gets the locations of structures, reading the structure arrays rather than every unit on the map
+
+        Args:
+            * unit_type: Only structures of this type are included. All types if None
+            * player_index: Only structures owned by this player are included, 0 for you 1 for the enemy. Both players if None
+
+        Returns:
+            A list of the locations of matching structures, in flat index order
+        """
+        types = self.__structure_types
+        owners = self.__structure_owners
+        type_code = None if unit_type is None else self.get_type_code(unit_type)
+        locations = []
+        for index, blocked in enumerate(self.__blocked):
+            if blocked and (type_code is None or types[index] == type_code) and (player_index is None or owners[index] == player_index):
+                locations.append([index // self.ARENA_SIZE, index % self.ARENA_SIZE])
+        return locations
+
+    def get_unit_locations(self, player_index, unit_type=None):
+        """Gets the locations of a player's units from an index kept up to date as units are added and removed,
+        so it takes time proportional to the number of units found rather than the size of the board
+
+        Args:
+            * player_index: The player whose units are looked for, 0 for you 1 for the enemy
+            * unit_type: Only units of this type are included. All types if None
+
+        Returns:
+            A list of the locations with at least one matching unit, in flat index order.
+            Like get_blocked_mask, units appended directly to the list returned by game_map[x, y] are not tracked.
+        """
+        if unit_type is not None:
+            indices = list(self.__unit_index.get((player_index, unit_type), ()))
+        else:
+            indices = set()
+            for (owner, _), counts in self.__unit_index.items():
+                if owner == player_index:
+                    indices.update(counts)
+        return [[index // self.ARENA_SIZE, index % self.ARENA_SIZE] for index in sorted(indices)]
+
+    def count_units(self, player_index, unit_type=None):
+        """Counts a player's units using the same index as get_unit_locations
+
+        Args:
+            * player_index: The player whose units are counted, 0 for you 1 for the enemy
+            * unit_type: Only units of this type are counted. All types if None
+
+        Returns:
+            The number of matching units on the map
+        """
+        if unit_type is not None:
+            return sum(self.__unit_index.get((player_index, unit_type), {}).values())
+        return sum(sum(counts.values()) for (owner, _), counts in self.__unit_index.items() if owner == player_index)
+
+    def get_layout_key(self):
+        """Gets a hashable key describing which locations are blocked by structures
+
+        Returns:
+            A bytes copy of get_blocked_mask(). Two maps have equal keys exactly when their structures block the same locations,
+            which is all that pathfinding depends on. The key is cached until the blocked locations change.
+        """
+        if self.__layout_key is None:
+            self.__layout_key = bytes(self.__blocked)
+        return self.__layout_key
+
+    def mirror_location(self, location):
+        """Gets the location a left to right mirror image of location corresponds to. The arena is symmetric, so a unit
+        at the mirrored location on the mirrored board takes the mirror image of the path a unit at location takes.
+
+        Args:
+            location: A map location
+
+        Returns:
+            The mirrored location, [ARENA_SIZE - 1 - x, y]
+
+        """
+        return mirror_location(location)
+
+    def mirror_layout_key(self, layout_key=None):
+        """Gets the layout key of the left to right mirror image of a layout. Caches use it to share entries between a layout and its mirror.
+
+        Args:
+            layout_key: A key returned by get_layout_key. This map's layout if None
+
+        Returns:
+            The key of the mirrored layout
+
+        """
+        if layout_key is None:
+            layout_key = self.get_layout_key()
+        return mirror_layout_key(layout_key)
+
+    def mirror_edge(self, edge):
+        """Gets the edge a left to right mirror image of edge corresponds to
+
+        Args:
+            edge: A constant corresponding to one of the 4 edges, such as game_map.TOP_LEFT
+
+        Returns:
+            The mirrored edge, TOP_RIGHT <-> TOP_LEFT and BOTTOM_LEFT <-> BOTTOM_RIGHT
+
+        """
+        return mirror_edge(edge)
 
     def get_locations_in_range(self, location, radius):
-        """Gets locations in a circular area around a location
+        """Gets locations in a circular area around a location.
+        The offsets in range are computed once for each radius, so a call only moves them to location and checks the board bounds.
 
         Args:
             location: The center of our search area
@@ -204,16 +565,52 @@ class GameMap:
         if not self.in_arena_bounds(location):
             self._invalid_coordinates(location)
 
+        return self.__locations_in_range(location, radius, range_stencil(radius, self.config["unitInformation"][0]['getHitRadius']))
+
+    def get_locations_in_range_batch(self, locations, radius):
+        """Gets the locations in a circular area around each of many locations, sharing one lookup of the area's shape
+
+        Args:
+            locations: The centers of our search areas
+            radius: The radius of every search area
+
+        Returns:
+            A list with the locations within our search area around each center, as get_locations_in_range would return them
+
+        """
+        if radius < 0 or radius > self.ARENA_SIZE:
+            self.warn("Radius {} was passed to get_locations_in_range_batch. Expected integer between 0 and {}".format(radius, self.ARENA_SIZE))
+        stencil = range_stencil(radius, self.config["unitInformation"][0]['getHitRadius'])
+        results = []
+        for location in locations:
+            if not self.in_arena_bounds(location):
+                self._invalid_coordinates(location)
+            results.append(self.__locations_in_range(location, radius, stencil))
+        return results
+
+    def __locations_in_range(self, location, radius, stencil):
         x, y = location
+        if x != int(x) or y != int(y):
+            #The stencil only holds offsets between tile centers, so search around a point between tiles directly
+            locations = []
+            search_radius = math.ceil(radius)
+            getHitRadius = self.config["unitInformation"][0]['getHitRadius']
+            for i in range(int(x - search_radius), int(x + search_radius + 1)):
+                for j in range(int(y - search_radius), int(y + search_radius + 1)):
+                    new_location = [i, j]
+                    # A unit with a given range affects all locations who's centers are within that range + get hit radius
+                    if self.in_arena_bounds(new_location) and self.distance_between_locations(location, new_location) < radius + getHitRadius:
+                        locations.append(new_location)
+            return locations
+        x = int(x)
+        y = int(y)
+        size = self.ARENA_SIZE
         locations = []
-        search_radius = math.ceil(radius)
-        getHitRadius = self.config["unitInformation"][0]['getHitRadius']
-        for i in range(int(x - search_radius), int(x + search_radius + 1)):
-            for j in range(int(y - search_radius), int(y + search_radius + 1)):
-                new_location = [i, j]
-                # A unit with a given range affects all locations who's centers are within that range + get hit radius
-                if self.in_arena_bounds(new_location) and self.distance_between_locations(location, new_location) < radius + getHitRadius:
-                    locations.append(new_location)
+        for dx, dy in stencil:
+            i = x + dx
+            j = y + dy
+            if 0 <= i < size and 0 <= j < size and IN_BOUNDS[i * size + j]:
+                locations.append([i, j])
         return locations
 
     def distance_between_locations(self, location_1, location_2):
@@ -2,11 +2,16 @@ import math
 import json
 import sys
 
-from .navigation import ShortestPathFinder
+from .navigation import ShortestPathFinder, PathCache, FlowField, PocketMap, time_path
+from .graph_analysis import analyze_chokepoints
+from .damage import DamageMap
 from .util import send_command, debug_write
 from .unit import GameUnit
 from .game_map import GameMap
 
+#A turn with no units, for building a GameState that has not seen a real turn, such as a hypothetical board
+EMPTY_TURN = '{"turnInfo": [0, 0, -1], "p1Stats": [0, 0, 0, 0], "p2Stats": [0, 0, 0, 0], "p1Units": [], "p2Units": []}'
+
 def is_stationary(unit_type):
     """
         Args:
@@ -44,15 +49,17 @@ class GameState:
         * my_time (int): The time you took to submit your previous turn
         * enemy_health (int): Your opponents current remaining health
         * enemy_time (int): Your opponents current remaining time
+        * path_cache (:obj: PathCache): The cache of paths found by find_path_to_edge, see path_cache.info() for hit and miss counts
 
     """
 
-    def __init__(self, config, serialized_string):
+    def __init__(self, config, serialized_string, path_cache=None):
         """ Setup a turns variables using arguments passed
 
         Args:
             * config (JSON): A json object containing information about the game
             * serialized_string (string): A string containing information about the game state at the start of this turn
+            * path_cache (:obj: PathCache): A cache of paths to reuse, such as one prepared with PathCache.warm_up. A new cache is created if None
 
         """
         self.serialized_string = serialized_string
@@ -91,6 +98,7 @@ class GameState:
 
         self.game_map = GameMap(self.config)
         self._shortest_path_finder = ShortestPathFinder()
+        self.path_cache = path_cache if path_cache is not None else PathCache()
         self._build_stack = []
         self._deploy_stack = []
         self._player_resources = [
@@ -144,10 +152,10 @@ class GameState:
                         self.game_map[x,y][0].pending_removal = True
                 elif unit_type == UPGRADE:
                     if self.contains_stationary_unit([x,y]):
-                        self.game_map[x,y][0].upgrade()
+                        self.game_map._upgrade_unit(self.game_map[x,y][0])
                 else:
                     unit = GameUnit(unit_type, self.config, player_number, hp, x, y)
-                    self.game_map[x,y].append(unit)
+                    self.game_map._place_unit(unit)
 
     def __resource_required(self, unit_type):
         return self.SP if is_stationary(unit_type) else self.MP
@@ -441,7 +449,7 @@ class GameState:
                     if resources[SP] >= costs[SP] and resources[MP] >= costs[MP]:
                         self.__set_resource(SP, 0 - costs[SP])
                         self.__set_resource(MP, 0 - costs[MP])
-                        existing_unit.upgrade()
+                        self.game_map._upgrade_unit(existing_unit)
                         self._build_stack.append((UPGRADE, x, y))
                         spawned_units += 1
             else:
@@ -473,7 +481,9 @@ class GameState:
 
     def find_path_to_edge(self, start_location, target_edge=None):
         """Gets the path a unit at a given location would take. 
-        If final point is not on an edge, it is a self destruct path
+        If final point is not on an edge, it is a self destruct path.
+        Paths are cached on the current structure layout, so repeated calls are cheap until a structure is added or removed.
+        A path cached for the mirror image of the layout is mirrored rather than searched for again.
 
         Args:
             start_location: The location of a hypothetical unit
@@ -491,8 +501,205 @@ class GameState:
         if target_edge is None:
             target_edge = self.get_target_edge(start_location)
 
-        end_points = self.game_map.get_edge_locations(target_edge)
-        return self._shortest_path_finder.navigate_multiple_endpoints(start_location, end_points, self)
+        layout_key = self.game_map.get_layout_key()
+        path = self.path_cache.find_path(layout_key, start_location, target_edge)
+        if path is not None:
+            return path
+
+        #A flow field for this layout may already exist, reading the path from it is much cheaper than a search
+        flow_field = self.path_cache.find_flow_field(layout_key, target_edge)
+        if flow_field is not None:
+            path = flow_field.get_path(start_location)
+        #Flow fields only cover the board, so starts off the board are left to the ShortestPathFinder
+        if path is None:
+            end_points = self.game_map.get_edge_locations(target_edge)
+            path = self._shortest_path_finder.navigate_multiple_endpoints(start_location, end_points, self)
+        self.path_cache.store_path(layout_key, start_location, target_edge, path)
+        return path
+
+    def find_paths_from_edges(self, edges=None):
+        """Gets the path a unit would take from every location it could be spawned at on the given edges.
+        Spawn locations targeting the same edge share one FlowField, so this is much faster than calling
+        find_path_to_edge for each location.
+
+        Args:
+            edges: A list of edges to spawn from, game_map.BOTTOM_LEFT, game_map.TOP_RIGHT, etc. Your own edges if None.
+
+        Returns:
+            A dict mapping each unblocked (x, y) edge location to the path a unit spawned there would take
+
+        """
+        if edges is None:
+            edges = [self.game_map.BOTTOM_LEFT, self.game_map.BOTTOM_RIGHT]
+
+        paths = {}
+        for edge in edges:
+            edge_locations = self.game_map.get_edge_locations(edge)
+            if edge_locations is None:
+                continue
+            for location in edge_locations:
+                if self.contains_stationary_unit(location):
+                    continue
+                target_edge = self.get_target_edge(location)
+                path = self.get_flow_field(target_edge).get_path(location)
+                self.path_cache.store_path(self.game_map.get_layout_key(), location, target_edge, path)
+                paths[tuple(location)] = path
+        return paths
+
+    def find_timed_path_to_edge(self, unit, target_edge=None, start_frame=0):
+        """Gets the path a unit would take, along with the frames it would spend on each tile.
+        The unit moves once every 1/unit.speed frames, so upgrades that change its speed are respected.
+
+        Args:
+            unit: A mobile GameUnit, with x and y set to its location
+            target_edge: The edge the unit wants to reach. game_map.TOP_LEFT, game_map.BOTTOM_RIGHT, etc. Induced from the unit's location if None.
+            start_frame: The frame the unit starts moving from its location
+
+        Returns:
+            A list of [location, arrival_frame, departure_frame] for each tile in the path, see navigation.time_path
+
+        """
+        if not unit.speed:
+            self.warn("Attempted to find a timed path for {}, which can not move".format(unit.unit_type))
+            return
+        path = self.find_path_to_edge([unit.x, unit.y], target_edge)
+        if path is None:
+            return
+        return time_path(path, unit.speed, start_frame)
+
+    def find_timed_paths(self, units, start_frame=0):
+        """Gets timed paths for many units at once, such as every unit in a planned attack.
+        Units heading for the same edge share one FlowField, and units on the same tile share one path.
+
+        Args:
+            units: A list of mobile GameUnits, with x and y set to their locations
+            start_frame: The frame the units start moving
+
+        Returns:
+            A list with the timed path of each unit, see find_timed_path_to_edge, or None for units that can not move
+
+        """
+        layout_key = self.game_map.get_layout_key()
+        paths = {}
+        timed_paths = []
+        for unit in units:
+            location = [unit.x, unit.y]
+            if not unit.speed or self.contains_stationary_unit(location):
+                timed_paths.append(None)
+                continue
+            key = (unit.x, unit.y)
+            if key not in paths:
+                target_edge = self.get_target_edge(location)
+                path = self.path_cache.find_path(layout_key, location, target_edge)
+                if path is None:
+                    path = self.get_flow_field(target_edge).get_path(location)
+                    if path is None:
+                        #Off the board, see find_path_to_edge
+                        path = self.find_path_to_edge(location, target_edge)
+                    else:
+                        self.path_cache.store_path(layout_key, location, target_edge, path)
+                paths[key] = path
+            timed_paths.append(time_path(paths[key], unit.speed, start_frame))
+        return timed_paths
+
+    def get_path_traffic(self, player_index=1):
+        """Predicts the path of a unit spawned at every location a player can spawn mobile units at,
+        and counts how many of those paths pass through each tile. Uses find_paths_from_edges, so the
+        search work is shared between all spawn locations.
+
+        Args:
+            player_index: The player whose units are predicted, 0 for you 1 for the enemy
+
+        Returns:
+            A list of lists where traffic[x][y] is the number of predicted paths passing through [x, y]
+
+        """
+        if not player_index == 0 and not player_index == 1:
+            self._invalid_player_index(player_index)
+            return
+
+        if player_index == 0:
+            edges = [self.game_map.BOTTOM_LEFT, self.game_map.BOTTOM_RIGHT]
+        else:
+            edges = [self.game_map.TOP_LEFT, self.game_map.TOP_RIGHT]
+        traffic = [[0] * self.ARENA_SIZE for _ in range(self.ARENA_SIZE)]
+        for path in self.find_paths_from_edges(edges).values():
+            for x, y in path:
+                traffic[x][y] += 1
+        return traffic
+
+    def get_flow_field(self, target_edge):
+        """Gets the FlowField towards an edge for the current structure layout.
+        Paths for many start locations towards the same edge can be read from one flow field,
+        sharing a single breadth first search.
+
+        Args:
+            target_edge: The edge units are trying to reach. game_map.TOP_LEFT, game_map.BOTTOM_RIGHT, etc.
+
+        The flow field is cached and shared with later calls for the same layout, so it cannot be repaired with block or unblock.
+        Use flow_field.copy() to try out a structure without changing it.
+
+        Returns:
+            A FlowField, see navigation.FlowField. Use flow_field.get_path(location) to get the path from a location
+
+        """
+        layout_key = self.game_map.get_layout_key()
+        flow_field = self.path_cache.find_flow_field(layout_key, target_edge)
+        if flow_field is None:
+            end_points = self.game_map.get_edge_locations(target_edge)
+            if end_points is None:
+                return
+            flow_field = FlowField(layout_key, end_points, self.get_pocket_map())
+            self.path_cache.store_flow_field(target_edge, flow_field)
+        return flow_field
+
+    def get_pocket_map(self):
+        """Gets the PocketMap labelling every pocket of pathable space for the current structure layout.
+        Use it to check whether units can reach their edge, or where they will self destruct, without pathfinding.
+
+        Returns:
+            A PocketMap, see navigation.PocketMap
+
+        """
+        layout_key = self.game_map.get_layout_key()
+        pocket_map = self.path_cache.get_pocket_map(layout_key)
+        if pocket_map is None:
+            pocket_map = PocketMap(layout_key, self.game_map.get_edges())
+            self.path_cache.store_pocket_map(pocket_map)
+        return pocket_map
+
+    def find_chokepoints(self, player_index=0):
+        """Finds the tiles that units attacking player_index must funnel through, for the current structure layout.
+        Takes a few milliseconds, so store the result rather than calling it repeatedly within a turn.
+
+        Args:
+            player_index: The defending player, 0 for you 1 for the enemy
+
+        Returns:
+            A dict mapping each edge the opponent can spawn on to a dict with a 'min_cut' list, the fewest
+            tiles on player_index's half that would block every path to the opposite edge (None if there is no such set),
+            and a 'separating' list, the tiles every one of those paths passes through. See graph_analysis
+
+        """
+        if not player_index == 1 and not player_index == 0:
+            self._invalid_player_index(player_index)
+            return
+
+        return analyze_chokepoints(self.game_map, player_index)
+
+    def set_pathfinder(self, pathfinder):
+        """Sets the pathfinder used by find_path_to_edge.
+        Paths already in path_cache are kept, so the pathfinder must return the same paths as ShortestPathFinder.
+
+        Args:
+            pathfinder: An object with a navigate_multiple_endpoints(start_point, end_points, game_state) method,
+                such as navigation.ShortestPathFinder (the default) or navigation.FlatPathFinder
+
+        """
+        if not hasattr(pathfinder, "navigate_multiple_endpoints"):
+            self.warn("Passed a {} to set_pathfinder. Expected an object with a navigate_multiple_endpoints method.".format(type(pathfinder)))
+            return
+        self._shortest_path_finder = pathfinder
 
     def contains_stationary_unit(self, location):
         """Check if a location is blocked, return structures unit if it is
@@ -641,3 +848,36 @@ class GameState:
                 if unit.damage_i + unit.damage_f > 0 and unit.player_index != player_index and self.game_map.distance_between_locations(location, location_unit) <= unit.attackRange:
                     attackers.append(unit)
         return attackers
+
+    def get_damage_map(self, player_index=0):
+        """Gets a DamageMap of the damage per frame a player's mobile units would take on each tile from enemy structures.
+        Only structures are counted, get_attackers also counts enemy mobile units that can attack, so the two only agree
+        when there are none on the board. The map is cached on the enemy structures, so scoring many paths with it
+        is much cheaper than calling get_attackers on every tile of every path.
+
+        Args:
+            player_index: The index corresponding to the defending player, 0 for you 1 for the enemy
+
+        Returns:
+            A DamageMap, see damage.DamageMap. Use damage_map.score_path(path) to get the damage taken along a path
+
+        """
+        if not player_index == 0 and not player_index == 1:
+            self._invalid_player_index(player_index)
+            return
+
+        attackers = []
+        for index, blocked in enumerate(self.game_map.get_blocked_mask()):
+            if blocked:
+                x, y = divmod(index, self.ARENA_SIZE)
+                for unit in self.game_map[x, y]:
+                    if unit.stationary and unit.player_index != player_index and unit.damage_i + unit.damage_f > 0:
+                        attackers.append((x, y, unit.damage_i, unit.attackRange))
+        attackers = tuple(attackers)
+
+        damage_map = self.path_cache.find_damage_map(player_index, attackers)
+        if damage_map is None:
+            max_range = max(unit.get('attackRange', 0) for unit in self.config["unitInformation"])
+            damage_map = DamageMap(player_index, attackers, max_range, self.config["unitInformation"][0]['getHitRadius'])
+            self.path_cache.store_damage_map(damage_map)
+        return damage_map
@@ -0,0 +1,257 @@
+"""
+Graph analysis of the pathable space on a GameMap. Tiles are nodes, and open tiles next to each other are connected.
+These functions find the tiles that all units travelling between two sets of locations must funnel through,
+without trying wall placements one at a time with find_path_to_edge.
+"""
+
+from .navigation import NEIGHBORS, NUM_CELLS, IN_BOUNDS, location_to_index, index_to_location
+
+#Capacity of tiles that can not be cut, larger than any possible cut
+_UNCUTTABLE = NUM_CELLS
+
+def find_min_vertex_cut(game_map, source_locations, sink_locations, cuttable=None):
+    """Finds the smallest set of open tiles that, if blocked, would stop every unit at source_locations from reaching sink_locations
+
+    Args:
+        * game_map: The GameMap to analyze
+        * source_locations: The locations units start at, such as an enemy spawn edge
+        * sink_locations: The locations units want to reach, such as the edge they are targeting
+        * cuttable: A list of the locations that may be part of the cut, such as the tiles you can build on. Any open tile if None
+
+    Returns:
+        A list of locations forming a minimum cut, or None if no cut made of cuttable tiles exists.
+        The list is empty if the sources already can not reach the sinks.
+
+    """
+    blocked = game_map.get_blocked_mask()
+    capacities = _tile_capacities(blocked, cuttable)
+    sources = _open_indices(source_locations, blocked)
+    sinks = _open_indices(sink_locations, blocked)
+
+    #Each tile is split into an 'in' node 2 * index and an 'out' node 2 * index + 1, joined by an edge with the tile's capacity
+    source_node = 2 * NUM_CELLS
+    sink_node = source_node + 1
+    graph = _FlowGraph(sink_node + 1)
+    for index in range(NUM_CELLS):
+        if capacities[index]:
+            graph.add_edge(2 * index, 2 * index + 1, capacities[index])
+            for neighbor in NEIGHBORS[index]:
+                if neighbor != -1 and capacities[neighbor]:
+                    graph.add_edge(2 * index + 1, 2 * neighbor, _UNCUTTABLE)
+    for index in sources:
+        graph.add_edge(source_node, 2 * index, _UNCUTTABLE)
+    for index in sinks:
+        graph.add_edge(2 * index + 1, sink_node, _UNCUTTABLE)
+
+    if graph.max_flow(source_node, sink_node) >= _UNCUTTABLE:
+        return
+    reachable = graph.reachable_from(source_node)
+    return [index_to_location(index) for index in range(NUM_CELLS)
+            if capacities[index] and reachable[2 * index] and not reachable[2 * index + 1]]
+
+def find_separating_tiles(game_map, source_locations, sink_locations):
+    """Finds the open tiles that every path from source_locations to sink_locations passes through,
+    the articulation tiles whose removal alone would cut the sources off from the sinks
+
+    Args:
+        * game_map: The GameMap to analyze
+        * source_locations: The locations units start at, such as an enemy spawn edge
+        * sink_locations: The locations units want to reach, such as the edge they are targeting
+
+    Returns:
+        A list of locations, empty if there are none or the sources can not reach the sinks
+
+    """
+    blocked = game_map.get_blocked_mask()
+    sources = _open_indices(source_locations, blocked)
+    sinks = set(_open_indices(sink_locations, blocked))
+    if not sources or not sinks:
+        return []
+
+    #Depth first search from a virtual node joined to every source, recording discovery order, low links and subtree ranges.
+    #The virtual node is index NUM_CELLS, and a virtual sink node NUM_CELLS + 1 is joined to every sink.
+    root = NUM_CELLS
+    sink_node = NUM_CELLS + 1
+
+    def neighbors_of(node):
+        if node == root:
+            return sources
+        if node == sink_node:
+            return list(sinks)
+        result = [neighbor for neighbor in NEIGHBORS[node] if neighbor != -1 and not blocked[neighbor]]
+        if node in sinks:
+            result.append(sink_node)
+        if node in source_set:
+            result.append(root)
+        return result
+
+    source_set = set(sources)
+    discovery = {root: 0}
+    low = {root: 0}
+    finish = {}
+    children = {root: []}
+    stack = [(root, iter(neighbors_of(root)))]
+    counter = 1
+    while stack:
+        node, neighbors = stack[-1]
+        advanced = False
+        for neighbor in neighbors:
+            if neighbor not in discovery:
+                discovery[neighbor] = low[neighbor] = counter
+                counter += 1
+                children[node].append(neighbor)
+                children[neighbor] = []
+                stack.append((neighbor, iter(neighbors_of(neighbor))))
+                advanced = True
+                break
+            elif discovery[neighbor] < low[node]:
+                low[node] = discovery[neighbor]
+        if not advanced:
+            stack.pop()
+            finish[node] = counter
+            if stack:
+                parent = stack[-1][0]
+                if low[node] < low[parent]:
+                    low[parent] = low[node]
+
+    if sink_node not in discovery:
+        return []
+    sink_discovery = discovery[sink_node]
+    separating = []
+    for node, node_children in children.items():
+        if node == root or node == sink_node:
+            continue
+        for child in node_children:
+            if low[child] >= discovery[node] and discovery[child] <= sink_discovery < finish[child]:
+                separating.append(index_to_location(node))
+                break
+    separating.sort()
+    return separating
+
+def analyze_chokepoints(game_map, player_index=0):
+    """Finds the choke points for units attacking player_index, for each edge the opponent can spawn on.
+    Units spawned on an edge target the opposite edge, so the cut is between each opponent edge and the edge opposite it,
+    and only tiles on player_index's half of the board, where they can build, may be cut.
+
+    Args:
+        * game_map: The GameMap to analyze
+        * player_index: The defending player, 0 for you 1 for the enemy
+
+    Returns:
+        A dict mapping each opponent spawn edge to a dict with a 'min_cut' list (see find_min_vertex_cut)
+        and a 'separating' list (see find_separating_tiles)
+
+    """
+    if player_index == 0:
+        spawn_edges = [game_map.TOP_LEFT, game_map.TOP_RIGHT]
+        buildable = [location for location in game_map if location[1] < game_map.HALF_ARENA]
+    else:
+        spawn_edges = [game_map.BOTTOM_LEFT, game_map.BOTTOM_RIGHT]
+        buildable = [location for location in game_map if location[1] >= game_map.HALF_ARENA]
+    opposite_edges = {game_map.TOP_LEFT: game_map.BOTTOM_RIGHT, game_map.TOP_RIGHT: game_map.BOTTOM_LEFT,
+                      game_map.BOTTOM_LEFT: game_map.TOP_RIGHT, game_map.BOTTOM_RIGHT: game_map.TOP_LEFT}
+
+    chokepoints = {}
+    for spawn_edge in spawn_edges:
+        sources = game_map.get_edge_locations(spawn_edge)
+        sinks = game_map.get_edge_locations(opposite_edges[spawn_edge])
+        chokepoints[spawn_edge] = {
+            "min_cut": find_min_vertex_cut(game_map, sources, sinks, buildable),
+            "separating": find_separating_tiles(game_map, sources, sinks)
+        }
+    return chokepoints
+
+def _tile_capacities(blocked, cuttable):
+    """Capacity of each flat index, 0 for blocked or out of bounds tiles, 1 for cuttable tiles and _UNCUTTABLE otherwise
+
+    """
+    if cuttable is None:
+        return [1 if IN_BOUNDS[index] and not blocked[index] else 0 for index in range(NUM_CELLS)]
+    capacities = [_UNCUTTABLE if IN_BOUNDS[index] and not blocked[index] else 0 for index in range(NUM_CELLS)]
+    for index in _open_indices(cuttable, blocked):
+        capacities[index] = 1
+    return capacities
+
+def _open_indices(locations, blocked):
+    """Flat indices of the in bounds, unblocked locations in a list
+
+    """
+    indices = []
+    for location in locations:
+        x, y = location
+        if 0 <= x < 28 and 0 <= y < 28:
+            index = location_to_index(location)
+            if IN_BOUNDS[index] and not blocked[index]:
+                indices.append(index)
+    return indices
+
+
+class _FlowGraph:
+    """A directed graph with edge capacities for finding maximum flows.
+    Edge i and its reverse residual edge i ^ 1 are stored next to each other.
+    """
+    def __init__(self, num_nodes):
+        self.adjacent = [[] for _ in range(num_nodes)]
+        self.targets = []
+        self.capacities = []
+
+    def add_edge(self, start, end, capacity):
+        self.adjacent[start].append(len(self.targets))
+        self.targets.append(end)
+        self.capacities.append(capacity)
+        self.adjacent[end].append(len(self.targets))
+        self.targets.append(start)
+        self.capacities.append(0)
+
+    def max_flow(self, source, sink):
+        """Pushes flow along shortest augmenting paths (Edmonds-Karp) until none are left
+
+        Returns:
+            The total flow, stopping early once it reaches _UNCUTTABLE
+
+        """
+        flow = 0
+        num_nodes = len(self.adjacent)
+        adjacent, targets, capacities = self.adjacent, self.targets, self.capacities
+        while flow < _UNCUTTABLE:
+            parent_edge = [-1] * num_nodes
+            parent_edge[source] = len(targets)
+            queue = [source]
+            for node in queue:
+                if parent_edge[sink] != -1:
+                    break
+                for edge in adjacent[node]:
+                    target = targets[edge]
+                    if capacities[edge] > 0 and parent_edge[target] == -1:
+                        parent_edge[target] = edge
+                        queue.append(target)
+            if parent_edge[sink] == -1:
+                break
+
+            path = []
+            node = sink
+            while node != source:
+                edge = parent_edge[node]
+                path.append(edge)
+                node = self.targets[edge ^ 1]
+            pushed = min(self.capacities[edge] for edge in path)
+            for edge in path:
+                self.capacities[edge] -= pushed
+                self.capacities[edge ^ 1] += pushed
+            flow += pushed
+        return flow
+
+    def reachable_from(self, source):
+        """Nodes reachable from source through edges with capacity left
+
+        """
+        reachable = [False] * len(self.adjacent)
+        reachable[source] = True
+        queue = [source]
+        for node in queue:
+            for edge in self.adjacent[node]:
+                target = self.targets[edge]
+                if self.capacities[edge] > 0 and not reachable[target]:
+                    reachable[target] = True
+                    queue.append(target)
+        return reachable
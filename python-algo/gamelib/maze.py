@@ -0,0 +1,287 @@
+"""
+Searches for wall placements that make enemy units walk as far as possible, or through as much turret fire as possible.
+Candidate layouts are scored by repairing copies of the current flow fields with FlowField.block and unblock,
+so thousands of layouts can be tried in the time one ShortestPathFinder search of the board would take per path.
+"""
+
+import math
+import random
+import time
+
+from .navigation import NEIGHBORS, NUM_CELLS, ARENA_SIZE, HALF_ARENA
+
+class MazeOptimizer:
+    """Finds a set of structures to build on your half of the board that maximizes the expected enemy path value.
+
+    Enemy units are assumed to spawn on every open tile of the top edges and head for the opposite edge.
+    The value of a path is the sum of tile_weights over the tiles it visits, or its length if no weights are given,
+    and the expected value is the average over all of those spawn locations. Weights such as the number of turrets
+    covering each tile turn this into turret exposure.
+
+    The search first places structures greedily, one at a time on the tile that improves the score most,
+    then spends the rest of the time budget on simulated annealing, moving single structures to other tiles.
+    On an open board no single structure makes a path longer, so ties are broken by how close the layout is
+    to closing off the shortest routes.
+
+    Attributes :
+        * best_score (float): The expected path value of the best placement found by the last call to optimize
+        * evaluations (int): The number of layouts scored by the last call to optimize
+
+    """
+    def __init__(self, game_state, sp_budget=None, time_budget=0.5, unit_type=None, candidates=None,
+                 tile_weights=None, allow_blocking=False, seed=None):
+        """Sets up the optimizer for the current structure layout of game_state
+
+        Args:
+            * game_state: The GameState to build on. It is not modified
+            * sp_budget: The SP to spend, all of your SP if None
+            * time_budget: The number of seconds optimize may run for
+            * unit_type: The structure to place, WALL if None
+            * candidates: A list of the locations structures may be placed on, every open location on your half if None
+            * tile_weights: A 28x28 list where tile_weights[x][y] is the value of an enemy unit visiting [x, y]. Every tile is worth 1 if None
+            * allow_blocking: If False, placements that stop enemy units that could reach their edge from reaching it are rejected
+            * seed: Seed for the random moves of the annealing step
+
+        """
+        self.game_state = game_state
+        if unit_type is None:
+            unit_type = game_state.config["unitInformation"][0]["shorthand"]
+        self.unit_type = unit_type
+        if sp_budget is None:
+            sp_budget = game_state.get_resource(game_state.SP)
+        cost = game_state.type_cost(unit_type)[game_state.SP]
+        self.max_structures = int(sp_budget // cost) if cost > 0 else 0
+        self.time_budget = time_budget
+        self.tile_weights = tile_weights
+        self.allow_blocking = allow_blocking
+        self._random = random.Random(seed)
+
+        game_map = game_state.game_map
+        if candidates is None:
+            candidates = [location for location in game_map if location[1] < game_map.HALF_ARENA]
+        self.candidates = [list(location) for location in candidates
+                           if game_map.in_arena_bounds(location) and not game_state.contains_stationary_unit(location)]
+
+        #Units spawned on the top left edge target the bottom right edge and the other way around
+        self._routes = [(game_map.TOP_LEFT, game_map.BOTTOM_RIGHT), (game_map.TOP_RIGHT, game_map.BOTTOM_LEFT)]
+        self._spawns = {}
+        for spawn_edge, target_edge in self._routes:
+            self._spawns[target_edge] = [location for location in game_map.get_edge_locations(spawn_edge)
+                                         if not game_state.contains_stationary_unit(location)]
+        self._enemy_half = [index for index in range(NUM_CELLS) if index % ARENA_SIZE >= HALF_ARENA]
+        self.best_score = None
+        self.evaluations = 0
+
+    def optimize(self):
+        """Searches for the best placement within the SP and time budgets
+
+        Returns:
+            A list of the locations to build unit_type on, in the order they were chosen
+
+        """
+        deadline = time.perf_counter() + self.time_budget
+        self.evaluations = 0
+        layout = self._initial_layout()
+
+        placed = []
+        while len(placed) < self.max_structures and time.perf_counter() < deadline:
+            best = None
+            for location in self._on_paths(layout):
+                if location in placed:
+                    continue
+                result = self._evaluate(layout, [location], [])
+                if result is not None and result.key > layout.key and (best is None or result.key > best.key):
+                    best = result
+                    best_location = location
+                if time.perf_counter() >= deadline:
+                    break
+            if best is None:
+                break
+            layout = best
+            placed.append(best_location)
+
+        best_placed = placed[:]
+        best_score = layout.score
+        best_layout = layout
+        if placed:
+            #Anneal from the greedy placement, cooling linearly to zero by the deadline
+            total_time = max(deadline - time.perf_counter(), 1e-9)
+            start_temperature = max(abs(layout.score), 1) * 0.02
+            while time.perf_counter() < deadline:
+                temperature = start_temperature * (deadline - time.perf_counter()) / total_time
+                moved = self._random.randrange(len(placed))
+                location = self._random.choice(self._on_paths(layout) or self.candidates)
+                if location in placed:
+                    continue
+                result = self._evaluate(layout, [location], [placed[moved]])
+                if result is None:
+                    continue
+                delta = result.score - layout.score
+                if delta >= 0 or (temperature > 0 and self._random.random() < math.exp(delta / temperature)):
+                    layout = result
+                    placed[moved] = location
+                    if layout.score > best_score:
+                        best_score = layout.score
+                        best_layout = layout
+                        best_placed = placed[:]
+
+        #Structures placed only to break ties may not have paid off, so drop any the score does not need
+        layout = best_layout
+        for location in best_placed[::-1]:
+            result = self._evaluate(layout, [], [location])
+            if result is not None and result.score >= best_score:
+                layout = result
+                best_score = result.score
+                best_placed.remove(location)
+
+        self.best_score = best_score
+        return best_placed
+
+    def _initial_layout(self):
+        """The layout of game_state, before any structures are placed
+
+        """
+        fields = {}
+        paths = {}
+        values = {}
+        total = 0
+        steps = 0
+        self._reachable = {}
+        for _, target_edge in self._routes:
+            flow_field = self.game_state.get_flow_field(target_edge)
+            #Copies of an explored field stay explored, so _evaluate never searches the same pockets again
+            flow_field.explore_all()
+            fields[target_edge] = flow_field
+            self._reachable[target_edge] = [flow_field.reaches_edge(location) for location in self._spawns[target_edge]]
+            paths[target_edge] = [flow_field.get_path(location) for location in self._spawns[target_edge]]
+            values[target_edge] = [self._path_value(path) for path in paths[target_edge]]
+            flow_field_total, flow_field_steps = _potential(flow_field.distances, self._enemy_half)
+            total += flow_field_total
+            steps += flow_field_steps
+        return _Layout(fields, paths, values, total, steps)
+
+    def _evaluate(self, layout, added, removed):
+        """Scores layout with structures added at and removed from the given locations.
+        Only the paths and potential near the tiles whose pathlength changed are recomputed.
+
+        Returns:
+            A new _Layout, or None if the layout is not allowed
+
+        """
+        self.evaluations += 1
+        fields = {}
+        paths = {}
+        values = {}
+        total = layout.total
+        steps = layout.steps
+        for target_edge, flow_field in layout.fields.items():
+            new_field = flow_field.copy()
+            changed = set()
+            for location in removed:
+                changed.update(new_field.unblock(location) or [])
+            for location in added:
+                changed.update(new_field.block(location) or [])
+
+            if not self.allow_blocking:
+                for location, reachable in zip(self._spawns[target_edge], self._reachable[target_edge]):
+                    if reachable and location[0] * ARENA_SIZE + location[1] in changed and not new_field.reaches_edge(location):
+                        return
+
+            #A tile's step towards the edge depends on its neighbors' pathlengths, so look one tile further out
+            touched = set(changed)
+            for index in changed:
+                touched.update(NEIGHBORS[index])
+            touched.discard(-1)
+            touched_enemy_half = [index for index in touched if index % ARENA_SIZE >= HALF_ARENA]
+            old_total, old_steps = _potential(flow_field.distances, touched_enemy_half)
+            new_total, new_steps = _potential(new_field.distances, touched_enemy_half)
+            total += new_total - old_total
+            steps += new_steps - old_steps
+
+            new_paths = layout.paths[target_edge][:]
+            new_values = layout.values[target_edge][:]
+            paths_through = layout.get_paths_through(target_edge)
+            redo = set()
+            for index in touched:
+                redo.update(paths_through.get(index, ()))
+            for i in redo:
+                new_paths[i] = new_field.get_path(self._spawns[target_edge][i])
+                new_values[i] = self._path_value(new_paths[i])
+            fields[target_edge] = new_field
+            paths[target_edge] = new_paths
+            values[target_edge] = new_values
+        return _Layout(fields, paths, values, total, steps)
+
+    def _path_value(self, path):
+        """The value of an enemy unit walking path
+
+        """
+        if self.tile_weights is None:
+            return len(path)
+        return sum(self.tile_weights[x][y] for x, y in path)
+
+    def _on_paths(self, layout):
+        """The candidate locations that some enemy path passes through. Blocking any other tile can not make a path longer
+
+        """
+        visited = set()
+        for paths in layout.paths.values():
+            for path in paths:
+                for x, y in path:
+                    visited.add((x, y))
+        return [location for location in self.candidates if (location[0], location[1]) in visited]
+
+
+class _Layout:
+    """A candidate structure layout, with its flow fields and the enemy paths through them
+
+    Attributes :
+        * fields (dict): The FlowField towards each target edge
+        * paths (dict): For each target edge, the path from each spawn location
+        * values (dict): For each target edge, the value of each of those paths
+        * total (int): The total pathlength of every tile
+        * steps (int): The number of ways tiles can step towards their edge
+        * score (float): The expected enemy path value
+        * key (tuple): The score with the potential to break ties, larger is better
+
+    """
+    def __init__(self, fields, paths, values, total, steps):
+        self.fields = fields
+        self.paths = paths
+        self.values = values
+        self.total = total
+        self.steps = steps
+        count = sum(len(edge_values) for edge_values in values.values())
+        self.score = sum(sum(edge_values) for edge_values in values.values()) / count if count else 0
+        #On an open board no single structure makes a path longer. The total pathlength rises once a route is
+        #closed off, and before that the number of ways tiles can step towards the edge falls as routes narrow
+        self.key = (self.score, total, -steps)
+        self._paths_through = {}
+
+    def get_paths_through(self, target_edge):
+        """Maps each flat index to the positions in paths[target_edge] of the paths that visit it
+
+        """
+        if target_edge not in self._paths_through:
+            paths_through = {}
+            for i, path in enumerate(self.paths[target_edge]):
+                for x, y in path:
+                    paths_through.setdefault(x * ARENA_SIZE + y, []).append(i)
+            self._paths_through[target_edge] = paths_through
+        return self._paths_through[target_edge]
+
+
+def _potential(distances, indices):
+    """The total pathlength and the number of steps towards the edge of the tiles at indices
+
+    """
+    total = 0
+    steps = 0
+    for index in indices:
+        distance = distances[index]
+        if distance > 0:
+            total += distance
+            for neighbor in NEIGHBORS[index]:
+                if neighbor != -1 and distances[neighbor] == distance - 1:
+                    steps += 1
+    return total, steps
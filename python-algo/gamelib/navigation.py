@@ -2,6 +2,7 @@ import heapq
 import math
 import sys
 import queue
+from collections import OrderedDict
 from .util import debug_write
 
 class Node:
@@ -52,17 +53,19 @@ class ShortestPathFinder:
         self.game_state = game_state
         self.game_map = [[Node() for x in range(self.game_state.ARENA_SIZE)] for y in range(self.game_state.ARENA_SIZE)]
 
-    def navigate_multiple_endpoints(self, start_point, end_points, game_state):
+    def navigate_multiple_endpoints(self, start_point, end_points, game_state, previous_move_direction=0):
         """Finds the path a unit would take to reach a set of endpoints
 
         Args:
             * start_point: The starting location of the unit
             * end_points: The end points of the unit, should be a list of edge locations
             * game_state: The current game state
+            * previous_move_direction: For a unit that has already moved, HORIZONTAL or VERTICAL for its last move, which changes how ties are broken
 
         Returns:
             The path a unit at start_point would take when trying to reach end_points given the current game state.
             Note that this path can change if a tower is destroyed during pathing, or if you or your enemy places structures.
+            PathTracker keeps the paths of moving units up to date as that happens.
 
         """
         if game_state.contains_stationary_unit(start_point):
@@ -77,7 +80,7 @@ class ShortestPathFinder:
         #Do pathfinding
         ideal_endpoints = self._idealness_search(start_point, end_points)
         self._validate(ideal_endpoints, end_points)
-        return self._get_path(start_point, end_points)
+        return self._get_path(start_point, end_points, previous_move_direction)
 
     def _idealness_search(self, start, end_points):
         """
@@ -194,14 +197,14 @@ class ShortestPathFinder:
         #self.print_map()
         return
 
-    def _get_path(self, start_point, end_points):
+    def _get_path(self, start_point, end_points, previous_move_direction=0):
         """Once all nodes are validated, and a target is found, the unit can path to its target
 
         """
         #GET THE PATH
         path = [start_point]
         current = start_point
-        move_direction = 0
+        move_direction = previous_move_direction
 
         while not self.game_map[current[0]][current[1]].pathlength == 0:
             #debug_write("current tile {} has cost {}".format(current, self.game_map[current[0]][current[1]].pathlength))
@@ -314,3 +317,1351 @@ class ShortestPathFinder:
             sys.stderr.write(" ")
         sys.stderr.write(str(number))
         sys.stderr.write(" ")
+
+
+ARENA_SIZE = 28
+HALF_ARENA = ARENA_SIZE // 2
+NUM_CELLS = ARENA_SIZE * ARENA_SIZE
+
+def location_to_index(location):
+    """Converts an [x, y] location into an index into a flat board array
+
+    """
+    return location[0] * ARENA_SIZE + location[1]
+
+def index_to_location(index):
+    """Converts an index into a flat board array back into an [x, y] location
+
+    """
+    return [index // ARENA_SIZE, index % ARENA_SIZE]
+
+def _build_bounds_table():
+    """Builds a flat list that is True for every index inside the diamond shaped arena.
+    Mirrors GameMap.in_arena_bounds
+    """
+    in_bounds = [False] * NUM_CELLS
+    for x in range(ARENA_SIZE):
+        for y in range(ARENA_SIZE):
+            if y < HALF_ARENA:
+                row_size = y + 1
+            else:
+                row_size = ARENA_SIZE - y
+            startx = HALF_ARENA - row_size
+            endx = startx + (2 * row_size) - 1
+            in_bounds[x * ARENA_SIZE + y] = startx <= x <= endx
+    return in_bounds
+
+def _build_neighbor_table(in_bounds):
+    """Builds, for every index, the indices of its 4 neighbors in the same order as
+    ShortestPathFinder._get_neighbors (up, down, right, left). Out of bounds neighbors are -1.
+    """
+    neighbors = []
+    for index in range(NUM_CELLS):
+        x, y = index // ARENA_SIZE, index % ARENA_SIZE
+        row = []
+        for nx, ny in ((x, y + 1), (x, y - 1), (x + 1, y), (x - 1, y)):
+            if 0 <= nx < ARENA_SIZE and 0 <= ny < ARENA_SIZE and in_bounds[nx * ARENA_SIZE + ny]:
+                row.append(nx * ARENA_SIZE + ny)
+            else:
+                row.append(-1)
+        neighbors.append(tuple(row))
+    return neighbors
+
+IN_BOUNDS = _build_bounds_table()
+NEIGHBORS = _build_neighbor_table(IN_BOUNDS)
+#For each flat index, the flat index of the location mirrored left to right
+MIRROR_INDEX = [(ARENA_SIZE - 1 - index // ARENA_SIZE) * ARENA_SIZE + index % ARENA_SIZE for index in range(NUM_CELLS)]
+
+#Offsets of the locations in range of a location, keyed on (radius, getHitRadius)
+_RANGE_STENCILS = {}
+
+def range_stencil(radius, get_hit_radius):
+    """Gets the (dx, dy) offsets from a location to the locations within radius of it, using the rule of GameMap.get_locations_in_range.
+    Offsets are ordered by dx then dy, and are computed once for each radius.
+
+    """
+    key = (radius, get_hit_radius)
+    stencil = _RANGE_STENCILS.get(key)
+    if stencil is None:
+        search_radius = math.ceil(radius)
+        stencil = []
+        for dx in range(-search_radius, search_radius + 1):
+            for dy in range(-search_radius, search_radius + 1):
+                # A unit with a given range affects all locations who's centers are within that range + get hit radius
+                if math.sqrt(dx ** 2 + dy ** 2) < radius + get_hit_radius:
+                    stencil.append((dx, dy))
+        stencil = tuple(stencil)
+        _RANGE_STENCILS[key] = stencil
+    return stencil
+
+def mirror_location(location):
+    """Gets the location a left to right mirror image of location corresponds to
+
+    """
+    return [ARENA_SIZE - 1 - location[0], location[1]]
+
+def mirror_layout_key(layout_key):
+    """Mirrors a layout key (see GameMap.get_layout_key) left to right
+
+    """
+    return b"".join(layout_key[x * ARENA_SIZE:(x + 1) * ARENA_SIZE] for x in range(ARENA_SIZE - 1, -1, -1))
+
+def mirror_edge(edge):
+    """Gets the edge a left to right mirror image of edge corresponds to, TOP_RIGHT <-> TOP_LEFT and BOTTOM_LEFT <-> BOTTOM_RIGHT
+
+    """
+    return edge ^ 1
+
+def time_path(path, speed, start_frame=0):
+    """Annotates a path with the frames a unit spends on each tile. A unit moves once every 1/speed frames,
+    so it arrives at the i-th tile of its path i/speed frames after it started.
+
+    Args:
+        * path: A list of locations, such as one returned by GameState.find_path_to_edge
+        * speed: The speed of the unit, see GameUnit.speed
+        * start_frame: The frame the unit is on the first tile of path
+
+    Returns:
+        A list of [location, arrival_frame, departure_frame] for each tile in path. The departure frame of the
+        last tile is when the unit's next move would be due, which is when it scores or self destructs
+
+    """
+    frames_per_move = 1 / speed
+    timed_path = []
+    for i, location in enumerate(path):
+        arrival = int(round(start_frame + i * frames_per_move))
+        departure = int(round(start_frame + (i + 1) * frames_per_move))
+        timed_path.append([location, arrival, departure])
+    return timed_path
+
+#Offsets (dx, dy) for each neighbor slot in NEIGHBORS
+NEIGHBOR_OFFSETS = ((0, 1), (0, -1), (1, 0), (-1, 0))
+
+
+class FlatPathFinder:
+    """Handles pathfinding using flat arrays instead of a grid of Node objects.
+
+    Returns exactly the same paths as ShortestPathFinder, including its tie breaking rules,
+    but stores the board as a blocked mask and a distance array indexed by x * ARENA_SIZE + y
+    and walks a precomputed neighbor table instead of building neighbor lists.
+    Select it for a GameState with game_state.set_pathfinder(FlatPathFinder()).
+
+    Attributes :
+        * HORIZONTAL (int): A constant representing a horizontal movement
+        * VERTICAL (int): A constant representing a vertical movement
+
+    """
+    def __init__(self):
+        self.HORIZONTAL = 1
+        self.VERTICAL = 2
+
+    def navigate_multiple_endpoints(self, start_point, end_points, game_state, previous_move_direction=0):
+        """Finds the path a unit would take to reach a set of endpoints
+
+        Args:
+            * start_point: The starting location of the unit
+            * end_points: The end points of the unit, should be a list of edge locations
+            * game_state: The current game state
+            * previous_move_direction: For a unit that has already moved, HORIZONTAL or VERTICAL for its last move, which changes how ties are broken
+
+        Returns:
+            The path a unit at start_point would take when trying to reach end_points given the current game state.
+            Note that this path can change if a tower is destroyed during pathing, or if you or your enemy places structures.
+
+        """
+        if game_state.contains_stationary_unit(start_point):
+            return
+
+        blocked = bytearray(NUM_CELLS)
+        for location in game_state.game_map:
+            if game_state.contains_stationary_unit(location):
+                blocked[location_to_index(location)] = 1
+
+        distances = self._build_distances(location_to_index(start_point), end_points, blocked)
+        return self._get_path(start_point, end_points, distances, blocked, previous_move_direction)
+
+    def _build_distances(self, start, end_points, blocked):
+        """Fills a distance array for the pocket of pathable space containing start.
+        Tiles outside of the pocket are left at -1.
+        """
+        is_end = _end_mask(end_points)
+        idealness_table = _idealness_table(self._get_direction_from_endpoints(end_points))
+
+        #Flood the pocket, finding the most ideal tile as we go
+        pocket = [start]
+        in_pocket = bytearray(NUM_CELLS)
+        in_pocket[start] = 1
+        reaches_edge = False
+        most_ideal = start
+        best_idealness = -1
+        for index in pocket:
+            if is_end[index]:
+                reaches_edge = True
+            elif not reaches_edge:
+                idealness = idealness_table[index]
+                if idealness > best_idealness:
+                    best_idealness = idealness
+                    most_ideal = index
+            for neighbor in NEIGHBORS[index]:
+                if neighbor != -1 and not blocked[neighbor] and not in_pocket[neighbor]:
+                    in_pocket[neighbor] = 1
+                    pocket.append(neighbor)
+
+        #Breadth first search from the ideal tile(s), restricted to the pocket
+        distances = [-1] * NUM_CELLS
+        if reaches_edge:
+            current = [index for index in pocket if is_end[index]]
+        else:
+            current = [most_ideal]
+        for index in current:
+            distances[index] = 0
+        for index in current:
+            next_distance = distances[index] + 1
+            for neighbor in NEIGHBORS[index]:
+                if neighbor != -1 and in_pocket[neighbor] and distances[neighbor] == -1:
+                    distances[neighbor] = next_distance
+                    current.append(neighbor)
+        return distances
+
+    def _get_direction_from_endpoints(self, end_points):
+        """Gets the direction [x, y] of the edge made up by end_points, see ShortestPathFinder._get_direction_from_endpoints
+
+        """
+        return _direction_from_endpoints(end_points)
+
+    def _get_path(self, start_point, end_points, distances, blocked, previous_move_direction=0):
+        """Walks down the distance array from start_point, choosing moves the same way ShortestPathFinder does
+
+        """
+        return _walk_path(start_point, distances, blocked, _direction_from_endpoints(end_points), previous_move_direction)
+
+class ScratchPathFinder(FlatPathFinder):
+    """A FlatPathFinder that keeps its scratch state alive between calls.
+
+    Instead of clearing visited flags and distances before every search, each search
+    increments a generation counter and a tile only counts as visited if its stamp matches
+    the current generation. The blocked tiles are read directly from GameMap.get_blocked_mask,
+    so repeated path queries on the same turn do almost no allocation beyond the returned path.
+
+    """
+    def __init__(self):
+        super().__init__()
+        self._generation = 0
+        self._pocket_stamps = [0] * NUM_CELLS
+        self._distance_stamps = [0] * NUM_CELLS
+        self._distances = [-1] * NUM_CELLS
+        self._pocket_queue = [0] * NUM_CELLS
+        self._distance_queue = [0] * NUM_CELLS
+
+    def navigate_multiple_endpoints(self, start_point, end_points, game_state, previous_move_direction=0):
+        """Finds the path a unit would take to reach a set of endpoints, see FlatPathFinder.navigate_multiple_endpoints
+
+        """
+        if game_state.contains_stationary_unit(start_point):
+            return
+
+        blocked = game_state.game_map.get_blocked_mask()
+        distances = self._build_distances(location_to_index(start_point), end_points, blocked)
+        return self._get_path(start_point, end_points, distances, blocked, previous_move_direction)
+
+    def _build_distances(self, start, end_points, blocked):
+        """Fills the reused distance array for the pocket of pathable space containing start.
+        Only entries inside the pocket are valid for the current generation.
+        """
+        self._generation += 1
+        generation = self._generation
+        pocket_stamps = self._pocket_stamps
+        distance_stamps = self._distance_stamps
+        distances = self._distances
+
+        is_end = _end_mask(end_points)
+        idealness_table = _idealness_table(self._get_direction_from_endpoints(end_points))
+
+        #Flood the pocket, finding the most ideal tile as we go
+        pocket = self._pocket_queue
+        pocket[0] = start
+        pocket_stamps[start] = generation
+        head, tail = 0, 1
+        reaches_edge = False
+        most_ideal = start
+        best_idealness = -1
+        while head < tail:
+            index = pocket[head]
+            head += 1
+            if is_end[index]:
+                reaches_edge = True
+            elif not reaches_edge:
+                idealness = idealness_table[index]
+                if idealness > best_idealness:
+                    best_idealness = idealness
+                    most_ideal = index
+            for neighbor in NEIGHBORS[index]:
+                if neighbor != -1 and not blocked[neighbor] and pocket_stamps[neighbor] != generation:
+                    pocket_stamps[neighbor] = generation
+                    pocket[tail] = neighbor
+                    tail += 1
+
+        #Breadth first search from the ideal tile(s), restricted to the pocket
+        pocket_size = tail
+        current = self._distance_queue
+        head, tail = 0, 0
+        if reaches_edge:
+            for i in range(pocket_size):
+                index = pocket[i]
+                if is_end[index]:
+                    distance_stamps[index] = generation
+                    distances[index] = 0
+                    current[tail] = index
+                    tail += 1
+        else:
+            distance_stamps[most_ideal] = generation
+            distances[most_ideal] = 0
+            current[0] = most_ideal
+            tail = 1
+        while head < tail:
+            index = current[head]
+            head += 1
+            next_distance = distances[index] + 1
+            for neighbor in NEIGHBORS[index]:
+                if neighbor != -1 and pocket_stamps[neighbor] == generation and distance_stamps[neighbor] != generation:
+                    distance_stamps[neighbor] = generation
+                    distances[neighbor] = next_distance
+                    current[tail] = neighbor
+                    tail += 1
+        return distances
+
+HORIZONTAL = 1
+VERTICAL = 2
+#Larger than any pathlength, used for tiles whose pathlength is being recomputed
+_UNREACHED = NUM_CELLS
+
+def _direction_from_endpoints(end_points):
+    """Gets the direction [x, y] of the edge made up by end_points, see ShortestPathFinder._get_direction_from_endpoints
+
+    """
+    x, y = end_points[0]
+    return [-1 if x < HALF_ARENA else 1, -1 if y < HALF_ARENA else 1]
+
+def _walk_path(start_point, distances, blocked, direction, move_direction=0):
+    """Walks down a distance array from start_point until it reaches a tile with pathlength 0,
+    choosing moves the same way ShortestPathFinder._get_path does.
+
+    Every neighbor of a tile on a path is exactly one step closer to or further from the target,
+    so the next move only depends on which neighbors are one step closer, the previous move and the target direction.
+    That choice is read from NEXT_SLOT_TABLE instead of comparing neighbors one by one.
+    """
+    table = NEXT_SLOT_TABLE[_direction_key(direction)]
+    path = [[start_point[0], start_point[1]]]
+    current = location_to_index(start_point)
+    pathlength = distances[current]
+    while pathlength != 0:
+        pathlength -= 1
+        mask = 0
+        for bit, neighbor in NEIGHBOR_BITS[current]:
+            if distances[neighbor] == pathlength and not blocked[neighbor]:
+                mask |= bit
+        slot = table[move_direction][mask]
+        move_direction = VERTICAL if slot < 2 else HORIZONTAL
+        current = NEIGHBORS[current][slot]
+        path.append([current // ARENA_SIZE, current % ARENA_SIZE])
+    return path
+
+def _direction_key(direction):
+    """Index into NEXT_SLOT_TABLE for a direction [x, y] returned by _direction_from_endpoints
+
+    """
+    return (2 if direction[0] == 1 else 0) + (1 if direction[1] == 1 else 0)
+
+def _better_slot(new_slot, best_slot, previous_move_direction, direction):
+    """ShortestPathFinder._better_direction expressed with neighbor offsets relative to the current tile
+
+    """
+    if best_slot == -1:
+        return True
+    new_x, new_y = NEIGHBOR_OFFSETS[new_slot]
+    best_x, best_y = NEIGHBOR_OFFSETS[best_slot]
+    if previous_move_direction == HORIZONTAL and new_x != best_x:
+        return new_y != 0
+    if previous_move_direction == VERTICAL and new_y != best_y:
+        return new_x != 0
+    if previous_move_direction == 0:
+        return new_y != 0
+    if new_y == best_y:
+        return (direction[0] == 1 and new_x > best_x) or (direction[0] == -1 and new_x < best_x)
+    if new_x == best_x:
+        return (direction[1] == 1 and new_y > best_y) or (direction[1] == -1 and new_y < best_y)
+    return True
+
+def _build_next_slot_table():
+    """Builds NEXT_SLOT_TABLE[direction key][previous move direction][candidate mask], the neighbor slot
+    ShortestPathFinder._choose_next_move picks when the neighbors one step closer to the target are the slots set in candidate mask
+    """
+    table = []
+    for direction in ([-1, -1], [-1, 1], [1, -1], [1, 1]):
+        by_move_direction = []
+        for previous_move_direction in (0, HORIZONTAL, VERTICAL):
+            choices = []
+            for mask in range(16):
+                best_slot = -1
+                for slot in range(4):
+                    if mask & (1 << slot) and _better_slot(slot, best_slot, previous_move_direction, direction):
+                        best_slot = slot
+                choices.append(best_slot)
+            by_move_direction.append(tuple(choices))
+        table.append(tuple(by_move_direction))
+    return tuple(table)
+
+NEXT_SLOT_TABLE = _build_next_slot_table()
+#For each flat index, (1 << slot, neighbor index) for every in bounds neighbor
+NEIGHBOR_BITS = [tuple((1 << slot, neighbor) for slot, neighbor in enumerate(neighbors) if neighbor != -1) for neighbors in NEIGHBORS]
+
+_IDEALNESS_TABLES = {}
+_END_MASKS = {}
+
+def _idealness_table(direction):
+    """Gets the idealness of every flat index for units heading in direction, ignoring endpoints.
+    See ShortestPathFinder._get_idealness. Tables are built the first time they are needed, or by warm_up_tables.
+    """
+    key = _direction_key(direction)
+    table = _IDEALNESS_TABLES.get(key)
+    if table is None:
+        table = []
+        for index in range(NUM_CELLS):
+            x, y = index // ARENA_SIZE, index % ARENA_SIZE
+            idealness = 28 * y if direction[1] == 1 else 28 * (27 - y)
+            idealness += x if direction[0] == 1 else (27 - x)
+            table.append(idealness)
+        _IDEALNESS_TABLES[key] = table
+    return table
+
+def _end_mask(end_points):
+    """Gets a bytes mask over flat indices that is 1 for every location in end_points.
+    Masks are built the first time a set of end points is seen, or by warm_up_tables.
+    """
+    key = tuple(tuple(location) for location in end_points)
+    mask = _END_MASKS.get(key)
+    if mask is None:
+        mask = bytearray(NUM_CELLS)
+        for location in end_points:
+            if 0 <= location[0] < ARENA_SIZE and 0 <= location[1] < ARENA_SIZE:
+                mask[location_to_index(location)] = 1
+        mask = bytes(mask)
+        _END_MASKS[key] = mask
+    return mask
+
+def warm_up_tables(edges):
+    """Builds the idealness tables and endpoint masks for every edge ahead of time
+
+    Args:
+        edges: The four lists of edge locations, see GameMap.get_edges
+
+    """
+    for end_points in edges:
+        _idealness_table(_direction_from_endpoints(end_points))
+        _end_mask(end_points)
+
+
+class FlowField:
+    """The pathlength of every tile towards one edge, for a fixed structure layout
+
+    A unit's path depends only on the pocket of pathable space it starts in: if the pocket touches the
+    target edge the unit walks to the edge, otherwise it walks to the pocket's most ideal tile and self destructs.
+    A FlowField stores the pathlengths used by ShortestPathFinder for every pocket explored so far,
+    along with the pocket each tile belongs to, so the path from any start in an explored pocket can be
+    extracted in O(path length). Pockets are explored the first time a location in them is queried,
+    and all pockets touching the target edge share a single breadth first search.
+    If a PocketMap for the same layout is given, its labels are used instead of flooding each pocket.
+
+    Attributes :
+        * layout_key (bytes): The blocked mask this field was built for, see GameMap.get_layout_key
+        * end_points (list): The edge locations units are trying to reach
+        * distances (list): The pathlength of each flat index, -1 if blocked or not yet explored
+        * pocket_ids (list): The pocket of each flat index, -1 if blocked or not yet explored
+        * pocket_targets (list): For each pocket, the flat index of its self destruct tile, or -1 if the pocket touches the edge
+
+    """
+    def __init__(self, layout_key, end_points, pocket_map=None):
+        self.layout_key = layout_key
+        self.end_points = [list(location) for location in end_points]
+        self.distances = [-1] * NUM_CELLS
+        if pocket_map is None:
+            self.pocket_ids = [-1] * NUM_CELLS
+            self.pocket_targets = []
+        else:
+            self.pocket_ids = pocket_map.pocket_ids[:]
+            self.pocket_targets = pocket_map.get_pocket_targets(end_points)[:]
+        self._searched = [False] * len(self.pocket_targets)
+        self._direction = _direction_from_endpoints(end_points)
+        self._is_end = _end_mask(end_points)
+        self._idealness = _idealness_table(self._direction)
+        self._edge_searched = False
+        self._all_explored = False
+        self._cached = False
+
+    def get_path(self, start_location, previous_move_direction=0):
+        """Gets the path a unit at start_location would take, identical to ShortestPathFinder.navigate_multiple_endpoints
+
+        Args:
+            * start_location: The location of a hypothetical unit
+            * previous_move_direction: For a unit that has already moved, HORIZONTAL or VERTICAL for its last move, which changes how ties are broken
+
+        Returns:
+            The path as a list of locations, or None if start_location is blocked or out of bounds
+
+        """
+        index = self._explore(start_location)
+        if index is None:
+            return
+        return _walk_path(start_location, self.distances, self.layout_key, self._direction, previous_move_direction)
+
+    def get_pathlength(self, location):
+        """Gets the number of steps a unit at location would take to finish its path
+
+        Returns:
+            The pathlength, or None if location is blocked or out of bounds
+
+        """
+        index = self._explore(location)
+        if index is None:
+            return
+        return self.distances[index]
+
+    def reaches_edge(self, location):
+        """Checks if a unit at location can reach the target edge
+
+        Returns:
+            True if the pocket containing location touches the edge, False otherwise
+
+        """
+        index = self._explore(location)
+        return index is not None and self.pocket_targets[self.pocket_ids[index]] == -1
+
+    def get_self_destruct_location(self, location):
+        """Gets the location a unit at location would walk to before self destructing
+
+        Returns:
+            The self destruct location, or None if the unit can reach the edge or location is blocked
+
+        """
+        index = self._explore(location)
+        if index is None:
+            return
+        target = self.pocket_targets[self.pocket_ids[index]]
+        if target == -1:
+            return
+        return index_to_location(target)
+
+    def copy(self):
+        """Copies the flow field, so the copy can be repaired with block or unblock without changing the original.
+        The copy is not owned by any PathCache, even if the original is.
+
+        """
+        flow_field = FlowField.__new__(FlowField)
+        flow_field.__dict__.update(self.__dict__)
+        flow_field._cached = False
+        flow_field.distances = self.distances[:]
+        flow_field.pocket_ids = self.pocket_ids[:]
+        flow_field.pocket_targets = self.pocket_targets[:]
+        flow_field._searched = self._searched[:]
+        return flow_field
+
+    def mirror(self):
+        """Gets the flow field for the left to right mirror image of this field's layout, towards the mirrored edge.
+        The arena, the idealness of each tile and pathlengths are all symmetric, so this is exact and needs no search.
+
+        """
+        end_points = [[ARENA_SIZE - 1 - location[0], location[1]] for location in self.end_points]
+        flow_field = FlowField(mirror_layout_key(self.layout_key), end_points)
+        flow_field.distances = [self.distances[index] for index in MIRROR_INDEX]
+        flow_field.pocket_ids = [self.pocket_ids[index] for index in MIRROR_INDEX]
+        flow_field.pocket_targets = [target if target == -1 else MIRROR_INDEX[target] for target in self.pocket_targets]
+        flow_field._searched = self._searched[:]
+        flow_field._edge_searched = self._edge_searched
+        flow_field._all_explored = self._all_explored
+        return flow_field
+
+    def explore_all(self):
+        """Explores every pocket of pathable space, so that no later query needs to search
+
+        """
+        #block and unblock explore any pockets they create, so once everything is explored it stays that way
+        if self._all_explored:
+            return
+        blocked = self.layout_key
+        for index in range(NUM_CELLS):
+            if IN_BOUNDS[index] and not blocked[index]:
+                pocket_id = self.pocket_ids[index]
+                if pocket_id == -1:
+                    self._explore_pocket(index)
+                elif not self._searched[pocket_id]:
+                    self._search_pocket(pocket_id)
+        self._all_explored = True
+
+    def block(self, location):
+        """Updates the flow field as if a structure was placed at location.
+        Only the pathlengths of tiles whose shortest route went through location are recomputed,
+        and the result is identical to building a new FlowField for the new layout.
+        A flow field stored in a PathCache, like the ones GameState.get_flow_field returns, is shared by every lookup
+        for its layout and cannot be changed. Repair a copy of it instead, see copy.
+
+        Args:
+            location: The location of the new structure
+
+        Returns:
+            A list of the flat indices whose pathlength or pocket changed, or None if location is out of bounds or already blocked
+
+        Raises:
+            ValueError: If the flow field is stored in a PathCache
+
+        """
+        self._check_not_cached()
+        index = self._explore(location)
+        if index is None:
+            return
+        self.explore_all()
+        distances = self.distances
+        pocket_id = self.pocket_ids[index]
+        old_distance = distances[index]
+        self._set_blocked(index, 1)
+        distances[index] = -1
+        self.pocket_ids[index] = -1
+
+        if self.pocket_targets[pocket_id] == index:
+            #The pocket lost its most ideal tile, so every tile in it needs a new target
+            affected = [i for i in range(NUM_CELLS) if self.pocket_ids[i] == pocket_id]
+            orphans = affected
+        else:
+            affected = self._find_affected(index, old_distance)
+            orphans = self._repair_affected(affected)
+
+        #Tiles cut off from their old target form new pockets
+        for i in orphans:
+            distances[i] = -1
+            self.pocket_ids[i] = -1
+        for i in orphans:
+            if self.pocket_ids[i] == -1:
+                self._explore_pocket(i)
+        return [index] + affected
+
+    def unblock(self, location):
+        """Updates the flow field as if the structure at location was removed.
+        Pathlengths only ever decrease when a tile opens up, so the repair spreads outwards from location
+        and stops as soon as the old pathlengths are no worse. The result is identical to building a new FlowField for the new layout.
+        Like block, this cannot be used on a flow field stored in a PathCache.
+
+        Args:
+            location: The location of the removed structure
+
+        Returns:
+            A list of the flat indices whose pathlength or pocket changed, or None if location is out of bounds or not blocked
+
+        Raises:
+            ValueError: If the flow field is stored in a PathCache
+
+        """
+        self._check_not_cached()
+        x, y = location
+        if not (0 <= x < ARENA_SIZE and 0 <= y < ARENA_SIZE):
+            return
+        index = x * ARENA_SIZE + y
+        if not IN_BOUNDS[index] or not self.layout_key[index]:
+            return
+        self.explore_all()
+        self._set_blocked(index, 0)
+        blocked = self.layout_key
+        distances = self.distances
+        pocket_ids = self.pocket_ids
+        pocket_targets = self.pocket_targets
+
+        neighbor_pockets = []
+        for neighbor in NEIGHBORS[index]:
+            if neighbor != -1 and not blocked[neighbor] and pocket_ids[neighbor] not in neighbor_pockets:
+                neighbor_pockets.append(pocket_ids[neighbor])
+        edge_pockets = [pocket for pocket in neighbor_pockets if pocket_targets[pocket] == -1]
+
+        #Work out which pocket keeps its pathlengths, everything else merged into it is recomputed
+        if self._is_end[index] or edge_pockets:
+            kept = edge_pockets
+            target = -1
+        else:
+            kept = []
+            target = index
+            best_idealness = self._idealness[index]
+            for pocket in neighbor_pockets:
+                idealness = self._idealness[pocket_targets[pocket]]
+                if idealness > best_idealness:
+                    best_idealness = idealness
+                    kept = [pocket]
+                    target = pocket_targets[pocket]
+        if kept:
+            merged_id = kept[0]
+        else:
+            merged_id = len(pocket_targets)
+            pocket_targets.append(target)
+            self._searched.append(True)
+
+        if self._is_end[index] or not kept:
+            distances[index] = 0
+        else:
+            distances[index] = min(distances[neighbor] + 1 for neighbor in NEIGHBORS[index]
+                                   if neighbor != -1 and not blocked[neighbor] and pocket_ids[neighbor] in kept)
+        if target == -1:
+            self._edge_searched = True
+
+        changed = [index]
+        merged = [pocket for pocket in neighbor_pockets if pocket not in kept]
+        if merged:
+            for i in range(NUM_CELLS):
+                if pocket_ids[i] in merged:
+                    pocket_ids[i] = merged_id
+                    distances[i] = _UNREACHED
+                    changed.append(i)
+        pocket_ids[index] = merged_id
+
+        current = [index]
+        for i in current:
+            next_distance = distances[i] + 1
+            for neighbor in NEIGHBORS[i]:
+                if neighbor != -1 and not blocked[neighbor] and distances[neighbor] > next_distance:
+                    if distances[neighbor] != _UNREACHED:
+                        changed.append(neighbor)
+                    distances[neighbor] = next_distance
+                    current.append(neighbor)
+        return changed
+
+    def _check_not_cached(self):
+        """Refuses to change a flow field that a PathCache shares under its old layout
+
+        """
+        if self._cached:
+            raise ValueError("Cannot block or unblock a flow field stored in a PathCache, repair flow_field.copy() instead")
+
+    def _set_blocked(self, index, value):
+        """Replaces the layout key with one where index is set to value
+
+        """
+        self.layout_key = self.layout_key[:index] + bytes([value]) + self.layout_key[index + 1:]
+
+    def _find_affected(self, removed, old_distance):
+        """Finds the tiles whose every shortest route to their target went through the newly blocked tile removed.
+        Works outwards one pathlength at a time, a tile is affected if none of its neighbors one step closer to the target are unaffected.
+        """
+        blocked = self.layout_key
+        distances = self.distances
+        affected = []
+        affected_set = set()
+        layer = [neighbor for neighbor in NEIGHBORS[removed]
+                 if neighbor != -1 and not blocked[neighbor] and distances[neighbor] == old_distance + 1]
+        while layer:
+            next_layer = []
+            for index in layer:
+                if index in affected_set:
+                    continue
+                distance = distances[index]
+                supported = False
+                for neighbor in NEIGHBORS[index]:
+                    if neighbor != -1 and not blocked[neighbor] and distances[neighbor] == distance - 1 and neighbor not in affected_set:
+                        supported = True
+                        break
+                if supported:
+                    continue
+                affected_set.add(index)
+                affected.append(index)
+                for neighbor in NEIGHBORS[index]:
+                    if neighbor != -1 and not blocked[neighbor] and distances[neighbor] == distance + 1:
+                        next_layer.append(neighbor)
+            layer = next_layer
+        return affected
+
+    def _repair_affected(self, affected):
+        """Recomputes the pathlengths of affected tiles from their unaffected neighbors
+
+        Returns:
+            The affected tiles that can no longer reach their old target
+
+        """
+        blocked = self.layout_key
+        distances = self.distances
+        affected_set = set(affected)
+        for index in affected:
+            distances[index] = _UNREACHED
+        heap = []
+        for index in affected:
+            best = _UNREACHED
+            for neighbor in NEIGHBORS[index]:
+                if neighbor != -1 and not blocked[neighbor] and neighbor not in affected_set and distances[neighbor] + 1 < best:
+                    best = distances[neighbor] + 1
+            if best < _UNREACHED:
+                distances[index] = best
+                heap.append((best, index))
+        heapq.heapify(heap)
+        while heap:
+            distance, index = heapq.heappop(heap)
+            if distance != distances[index]:
+                continue
+            for neighbor in NEIGHBORS[index]:
+                if neighbor in affected_set and distances[neighbor] > distance + 1:
+                    distances[neighbor] = distance + 1
+                    heapq.heappush(heap, (distance + 1, neighbor))
+        return [index for index in affected if distances[index] == _UNREACHED]
+
+    def _explore(self, location):
+        """Makes sure the pocket containing location has been explored
+
+        Returns:
+            The flat index of location, or None if it is blocked or out of bounds
+
+        """
+        x, y = location
+        if not (0 <= x < ARENA_SIZE and 0 <= y < ARENA_SIZE):
+            return
+        index = x * ARENA_SIZE + y
+        if not IN_BOUNDS[index] or self.layout_key[index]:
+            return
+        pocket_id = self.pocket_ids[index]
+        if pocket_id == -1:
+            self._explore_pocket(index)
+        elif not self._searched[pocket_id]:
+            self._search_pocket(pocket_id)
+        return index
+
+    def _explore_pocket(self, start):
+        """Labels the unlabelled pocket containing start and fills in its pathlengths
+
+        """
+        blocked = self.layout_key
+        pocket_ids = self.pocket_ids
+        pocket_id = len(self.pocket_targets)
+        pocket = [start]
+        pocket_ids[start] = pocket_id
+        reaches_edge = False
+        most_ideal = start
+        best_idealness = -1
+        for index in pocket:
+            if self._is_end[index]:
+                reaches_edge = True
+            elif not reaches_edge:
+                idealness = self._idealness[index]
+                if idealness > best_idealness:
+                    best_idealness = idealness
+                    most_ideal = index
+            for neighbor in NEIGHBORS[index]:
+                if neighbor != -1 and not blocked[neighbor] and pocket_ids[neighbor] == -1:
+                    pocket_ids[neighbor] = pocket_id
+                    pocket.append(neighbor)
+
+        self.pocket_targets.append(-1 if reaches_edge else most_ideal)
+        self._searched.append(False)
+        self._search_pocket(pocket_id)
+
+    def _search_pocket(self, pocket_id):
+        """Fills in the pathlengths of a labelled pocket
+
+        """
+        target = self.pocket_targets[pocket_id]
+        if target != -1:
+            self._search([target])
+            self._searched[pocket_id] = True
+            return
+
+        if not self._edge_searched:
+            self._edge_searched = True
+            blocked = self.layout_key
+            sources = [index for index in range(NUM_CELLS) if self._is_end[index] and IN_BOUNDS[index] and not blocked[index]]
+            self._search(sources)
+        for other_id, other_target in enumerate(self.pocket_targets):
+            if other_target == -1:
+                self._searched[other_id] = True
+
+    def _search(self, sources):
+        """Breadth first search outwards from sources over unblocked tiles, setting pathlengths
+
+        """
+        blocked = self.layout_key
+        distances = self.distances
+        for index in sources:
+            distances[index] = 0
+        for index in sources:
+            next_distance = distances[index] + 1
+            for neighbor in NEIGHBORS[index]:
+                if neighbor != -1 and not blocked[neighbor] and distances[neighbor] == -1:
+                    distances[neighbor] = next_distance
+                    sources.append(neighbor)
+
+
+class PocketMap:
+    """Labels every pocket of pathable space on a structure layout
+
+    Every open tile is given the id of the connected pocket of open tiles it belongs to. For each target edge,
+    the pockets touching the edge and the most ideal tile of every other pocket are found in one pass and cached,
+    so checking whether a unit can reach its edge or where it will self destruct is an O(1) lookup for any start.
+
+    Attributes :
+        * layout_key (bytes): The blocked mask this map was built for, see GameMap.get_layout_key
+        * edges (list): The four lists of edge locations, see GameMap.get_edges
+        * pocket_ids (list): The pocket of each flat index, -1 if blocked or out of bounds
+        * pocket_sizes (list): The number of tiles in each pocket
+
+    """
+    def __init__(self, layout_key, edges):
+        self.layout_key = layout_key
+        self.edges = edges
+        self.pocket_ids = [-1] * NUM_CELLS
+        self.pocket_sizes = []
+        self._targets = {}
+        for index in range(NUM_CELLS):
+            if IN_BOUNDS[index] and not layout_key[index] and self.pocket_ids[index] == -1:
+                self._label(index)
+
+    def _label(self, start):
+        """Floods the pocket containing start with a new pocket id
+
+        """
+        blocked = self.layout_key
+        pocket_ids = self.pocket_ids
+        pocket_id = len(self.pocket_sizes)
+        pocket = [start]
+        pocket_ids[start] = pocket_id
+        for index in pocket:
+            for neighbor in NEIGHBORS[index]:
+                if neighbor != -1 and not blocked[neighbor] and pocket_ids[neighbor] == -1:
+                    pocket_ids[neighbor] = pocket_id
+                    pocket.append(neighbor)
+        self.pocket_sizes.append(len(pocket))
+
+    def get_pocket_id(self, location):
+        """Gets the pocket a location belongs to
+
+        Returns:
+            The pocket id, or None if location is blocked or out of bounds
+
+        """
+        x, y = location
+        if not (0 <= x < ARENA_SIZE and 0 <= y < ARENA_SIZE) or self.pocket_ids[x * ARENA_SIZE + y] == -1:
+            return
+        return self.pocket_ids[x * ARENA_SIZE + y]
+
+    def get_pocket_targets(self, end_points):
+        """Gets the target of every pocket for units trying to reach end_points
+
+        Returns:
+            A list with, for each pocket id, the flat index of its most ideal tile or -1 if the pocket touches the edge
+
+        """
+        key = tuple(tuple(location) for location in end_points)
+        targets = self._targets.get(key)
+        if targets is not None:
+            return targets
+
+        is_end = _end_mask(end_points)
+        idealness_table = _idealness_table(_direction_from_endpoints(end_points))
+        targets = [-1] * len(self.pocket_sizes)
+        best_idealness = [-1] * len(self.pocket_sizes)
+        reaches_edge = [False] * len(self.pocket_sizes)
+        for index, pocket_id in enumerate(self.pocket_ids):
+            if pocket_id == -1:
+                continue
+            if is_end[index]:
+                reaches_edge[pocket_id] = True
+                continue
+            idealness = idealness_table[index]
+            if idealness > best_idealness[pocket_id]:
+                best_idealness[pocket_id] = idealness
+                targets[pocket_id] = index
+        for pocket_id, reaches in enumerate(reaches_edge):
+            if reaches:
+                targets[pocket_id] = -1
+        self._targets[key] = targets
+        return targets
+
+    def reaches_edge(self, location, target_edge):
+        """Checks if a unit at location can reach target_edge
+
+        Returns:
+            True if the pocket containing location touches the edge, False otherwise
+
+        """
+        pocket_id = self.get_pocket_id(location)
+        return pocket_id is not None and self.get_pocket_targets(self.edges[target_edge])[pocket_id] == -1
+
+    def get_self_destruct_location(self, location, target_edge):
+        """Gets the location a unit at location would walk to before self destructing
+
+        Returns:
+            The self destruct location, or None if the unit can reach the edge or location is blocked
+
+        """
+        pocket_id = self.get_pocket_id(location)
+        if pocket_id is None:
+            return
+        target = self.get_pocket_targets(self.edges[target_edge])[pocket_id]
+        if target == -1:
+            return
+        return index_to_location(target)
+
+
+class PathTracker:
+    """Keeps the paths of tracked mobile units up to date as structures are destroyed during the action phase
+
+    The tracker listens to structure changes on a GameState's map (see GameMap.add_structure_listener).
+    When a structure is removed, the FlowField towards each edge a tracked unit is heading for is repaired with
+    FlowField.unblock, or taken from the GameState's PathCache if the new layout was seen before, and only the units
+    whose remaining route passes through or next to a tile whose pathlength changed are re-pathed.
+
+    Attributes :
+        * rerouted (list): The ids of the units whose path changed at the most recent structure change
+
+    """
+    def __init__(self, game_state):
+        """Starts listening to structure changes on game_state's map
+
+        Args:
+            game_state: The GameState whose map is updated as the action phase plays out
+
+        """
+        self.game_state = game_state
+        self.rerouted = []
+        self._units = {}
+        self._flow_fields = {}
+        game_state.game_map.add_structure_listener(self._on_structure_change)
+
+    def track(self, unit_id, location, target_edge=None):
+        """Starts tracking a unit
+
+        Args:
+            * unit_id: Any hashable id for the unit, such as the unit id from an action frame
+            * location: The unit's current location
+            * target_edge: The edge the unit is heading for. Induced from location if None.
+
+        Returns:
+            The unit's path, see GameState.find_path_to_edge, or None if location is blocked
+
+        """
+        if target_edge is None:
+            target_edge = self.game_state.get_target_edge(location)
+        path = self._get_flow_field(target_edge).get_path(location)
+        if path is None:
+            return
+        #Each unit is stored as [target_edge, path, index of its location in path, direction of the move onto path[0]]
+        self._units[unit_id] = [target_edge, path, 0, 0]
+        return self.get_path(unit_id)
+
+    def untrack(self, unit_id):
+        """Stops tracking a unit, such as one that was destroyed or scored
+
+        """
+        self._units.pop(unit_id, None)
+
+    def advance(self, unit_id, location):
+        """Records that a tracked unit has moved. If location is not on its path the unit is re-pathed from there
+
+        """
+        unit = self._units[unit_id]
+        path = unit[1]
+        for i in range(unit[2], len(path)):
+            if path[i][0] == location[0] and path[i][1] == location[1]:
+                unit[2] = i
+                return
+        current = path[unit[2]]
+        if abs(current[0] - location[0]) + abs(current[1] - location[1]) == 1:
+            move_direction = HORIZONTAL if current[0] != location[0] else VERTICAL
+        else:
+            move_direction = 0
+        path = self._get_flow_field(unit[0]).get_path(location, move_direction)
+        if path is not None:
+            unit[1] = path
+            unit[2] = 0
+            unit[3] = move_direction
+
+    def get_path(self, unit_id):
+        """Gets the rest of a tracked unit's path, starting at its current location
+
+        """
+        path, progress = self._units[unit_id][1:3]
+        return [list(location) for location in path[progress:]]
+
+    def close(self):
+        """Stops listening to structure changes
+
+        """
+        self.game_state.game_map.remove_structure_listener(self._on_structure_change)
+
+    def _get_flow_field(self, target_edge):
+        if target_edge not in self._flow_fields:
+            self._flow_fields[target_edge] = self.game_state.get_flow_field(target_edge)
+        return self._flow_fields[target_edge]
+
+    def _on_structure_change(self, location, blocked):
+        """Repairs the flow fields for the new layout and re-paths the units whose route was affected
+
+        """
+        self.rerouted = []
+        layout_key = self.game_state.game_map.get_layout_key()
+        path_cache = self.game_state.path_cache
+        for target_edge, old_field in list(self._flow_fields.items()):
+            flow_field = path_cache.find_flow_field(layout_key, target_edge)
+            if flow_field is not None:
+                old_field.explore_all()
+                flow_field.explore_all()
+                changed = [index for index in range(NUM_CELLS) if old_field.distances[index] != flow_field.distances[index]
+                           or old_field.pocket_ids[index] != flow_field.pocket_ids[index]]
+            else:
+                flow_field = old_field.copy()
+                changed = (flow_field.block(location) if blocked else flow_field.unblock(location)) or []
+                path_cache.store_flow_field(target_edge, flow_field)
+            self._flow_fields[target_edge] = flow_field
+
+            #A unit's next step depends on the pathlengths of the tiles next to it, so look one tile further out
+            touched = set(changed)
+            for index in changed:
+                touched.update(NEIGHBORS[index])
+            for unit_id, unit in self._units.items():
+                if unit[0] != target_edge:
+                    continue
+                path, progress = unit[1], unit[2]
+                if any(x * ARENA_SIZE + y in touched for x, y in path[progress:]):
+                    move_direction = self._last_move_direction(unit)
+                    new_path = flow_field.get_path(path[progress], move_direction)
+                    if new_path is not None and new_path != path[progress:]:
+                        unit[1] = new_path
+                        unit[2] = 0
+                        unit[3] = move_direction
+                        self.rerouted.append(unit_id)
+
+    def _last_move_direction(self, unit):
+        """The direction of a tracked unit's move onto its current location, 0 if it has not moved
+
+        """
+        target_edge, path, progress, first_move_direction = unit
+        if progress == 0:
+            return first_move_direction
+        return HORIZONTAL if path[progress][0] != path[progress - 1][0] else VERTICAL
+
+
+class PathCache:
+    """A bounded least recently used cache of paths and flow fields, used by GameState.find_path_to_edge and GameState.get_flow_field.
+    It also holds the DamageMaps built by GameState.get_damage_map
+
+    Paths are keyed on the structure layout (see GameMap.get_layout_key), the start location and the target edge.
+    Because the layout is part of the key, any change to the blocked locations makes old entries unreachable,
+    and they are evicted as new paths are stored.
+    Lookups through find_path, find_flow_field and find_damage_map fall back to the entry for the mirror image
+    of the board (see GameMap.mirror_layout_key), so a layout and its mirror share one computation.
+
+    Attributes :
+        * maxsize (int): The maximum number of paths stored
+        * flow_field_maxsize (int): The maximum number of flow fields, and of pocket maps and damage maps, stored
+        * hits (int): The number of find_path lookups that found a stored path, or one to mirror
+        * misses (int): The number of find_path lookups that did not
+
+    """
+    def __init__(self, maxsize=1024, flow_field_maxsize=32):
+        self.maxsize = maxsize
+        self.flow_field_maxsize = flow_field_maxsize
+        self.hits = 0
+        self.misses = 0
+        self._paths = OrderedDict()
+        self._flow_fields = OrderedDict()
+        self._pocket_maps = OrderedDict()
+        self._damage_maps = OrderedDict()
+
+    def get_path(self, layout_key, start_location, target_edge):
+        """Looks up a stored path, without trying the mirror image of the layout or counting a hit or miss
+
+        Returns:
+            A copy of the stored path, or None if there is no path stored for these arguments
+
+        """
+        key = (layout_key, start_location[0], start_location[1], target_edge)
+        path = self._paths.get(key)
+        if path is None:
+            return None
+        self._paths.move_to_end(key)
+        return [list(location) for location in path]
+
+    def find_path(self, layout_key, start_location, target_edge):
+        """Looks up a stored path. If there is none, but there is one from the mirrored start location on the
+        mirror image of the layout towards the mirrored edge, it is mirrored, stored and returned instead.
+
+        Returns:
+            A copy of the stored path, or None if neither is stored
+
+        """
+        path = self.get_path(layout_key, start_location, target_edge)
+        if path is not None:
+            self.hits += 1
+            return path
+        mirrored_start = mirror_location(start_location)
+        mirrored = self._paths.get((mirror_layout_key(layout_key), mirrored_start[0], mirrored_start[1], mirror_edge(target_edge)))
+        #A unit with no previous move breaks a tie between moving left and right by the order neighbors are checked in,
+        #which a mirror image reverses, so only paths that start with a vertical move are mirrored
+        if mirrored is None or (len(mirrored) > 1 and mirrored[0][1] == mirrored[1][1]):
+            self.misses += 1
+            return None
+        self.hits += 1
+        path = [[ARENA_SIZE - 1 - x, y] for x, y in mirrored]
+        self.store_path(layout_key, start_location, target_edge, path)
+        return path
+
+    def store_path(self, layout_key, start_location, target_edge, path):
+        """Stores a path, evicting the least recently used path if the cache is full
+
+        """
+        key = (layout_key, start_location[0], start_location[1], target_edge)
+        self._paths[key] = tuple(tuple(location) for location in path)
+        self._paths.move_to_end(key)
+        while len(self._paths) > self.maxsize:
+            self._paths.popitem(last=False)
+
+    def get_flow_field(self, layout_key, target_edge):
+        """Looks up a stored FlowField
+
+        Returns:
+            The stored FlowField, or None if there is no flow field stored for this layout and edge
+
+        """
+        key = (layout_key, target_edge)
+        flow_field = self._flow_fields.get(key)
+        if flow_field is not None:
+            self._flow_fields.move_to_end(key)
+        return flow_field
+
+    def find_flow_field(self, layout_key, target_edge):
+        """Looks up a stored FlowField. If there is none, but there is one for the mirror image of the layout
+        towards the mirrored edge, it is mirrored, stored and returned instead.
+
+        Returns:
+            A FlowField, or None if neither is stored
+
+        """
+        flow_field = self.get_flow_field(layout_key, target_edge)
+        if flow_field is None:
+            mirrored = self.get_flow_field(mirror_layout_key(layout_key), mirror_edge(target_edge))
+            if mirrored is not None:
+                flow_field = mirrored.mirror()
+                self.store_flow_field(target_edge, flow_field)
+        return flow_field
+
+    def store_flow_field(self, target_edge, flow_field):
+        """Stores a FlowField, evicting the least recently used flow field if the cache is full.
+        The stored field can no longer be repaired with block or unblock, only copies of it can.
+
+        """
+        #Later lookups for this layout share the field, so it must not be repaired in place
+        flow_field._cached = True
+        key = (flow_field.layout_key, target_edge)
+        self._flow_fields[key] = flow_field
+        self._flow_fields.move_to_end(key)
+        while len(self._flow_fields) > self.flow_field_maxsize:
+            self._flow_fields.popitem(last=False)
+
+    def get_pocket_map(self, layout_key):
+        """Looks up a stored PocketMap
+
+        Returns:
+            The stored PocketMap, or None if there is no pocket map stored for this layout
+
+        """
+        pocket_map = self._pocket_maps.get(layout_key)
+        if pocket_map is not None:
+            self._pocket_maps.move_to_end(layout_key)
+        return pocket_map
+
+    def store_pocket_map(self, pocket_map):
+        """Stores a PocketMap, evicting the least recently used pocket map if the cache is full
+
+        """
+        self._pocket_maps[pocket_map.layout_key] = pocket_map
+        self._pocket_maps.move_to_end(pocket_map.layout_key)
+        while len(self._pocket_maps) > self.flow_field_maxsize:
+            self._pocket_maps.popitem(last=False)
+
+    def get_damage_map(self, player_index, attackers):
+        """Looks up a stored DamageMap
+
+        Returns:
+            The stored DamageMap, or None if there is no damage map stored for these attackers
+
+        """
+        key = (player_index, attackers)
+        damage_map = self._damage_maps.get(key)
+        if damage_map is not None:
+            self._damage_maps.move_to_end(key)
+        return damage_map
+
+    def find_damage_map(self, player_index, attackers):
+        """Looks up a stored DamageMap. If there is none, but there is one for the mirror image of the attackers,
+        it is mirrored, stored and returned instead.
+
+        Args:
+            * player_index: The player whose mobile units take the damage
+            * attackers: A tuple of (x, y, damage_i, attackRange) for each attacking structure, sorted by location
+
+        Returns:
+            A DamageMap, or None if neither is stored
+
+        """
+        damage_map = self.get_damage_map(player_index, attackers)
+        if damage_map is None:
+            mirrored_attackers = tuple(sorted((ARENA_SIZE - 1 - x, y, damage, attack_range) for x, y, damage, attack_range in attackers))
+            mirrored = self.get_damage_map(player_index, mirrored_attackers)
+            if mirrored is not None:
+                damage_map = mirrored.mirror()
+                self.store_damage_map(damage_map)
+        return damage_map
+
+    def store_damage_map(self, damage_map):
+        """Stores a DamageMap, evicting the least recently used damage map if the cache is full
+
+        """
+        key = (damage_map.player_index, damage_map.attackers)
+        self._damage_maps[key] = damage_map
+        self._damage_maps.move_to_end(key)
+        while len(self._damage_maps) > self.flow_field_maxsize:
+            self._damage_maps.popitem(last=False)
+
+    def warm_up(self, game_map):
+        """Precomputes everything pathfinding needs on an empty board: the idealness tables for every edge,
+        the empty board PocketMap and FlowFields for all four edges, and the path from every edge location.
+        Intended to be called once from on_game_start, so that early turns need no pathfinding work.
+
+        Args:
+            game_map: A GameMap, only used for its edge locations
+
+        """
+        edges = game_map.get_edges()
+        warm_up_tables(edges)
+        layout_key = bytes(NUM_CELLS)
+        pocket_map = PocketMap(layout_key, edges)
+        self.store_pocket_map(pocket_map)
+        for target_edge, end_points in enumerate(edges):
+            flow_field = FlowField(layout_key, end_points, pocket_map)
+            flow_field.explore_all()
+            self.store_flow_field(target_edge, flow_field)
+        for spawn_edge, spawn_locations in enumerate(edges):
+            #Units target the edge opposite the one they spawn on
+            target_edge = (spawn_edge + 2) % 4
+            flow_field = self.get_flow_field(layout_key, target_edge)
+            for location in spawn_locations:
+                self.store_path(layout_key, location, target_edge, flow_field.get_path(location))
+
+    def clear(self):
+        """Removes all stored paths, flow fields, pocket maps and damage maps and resets the hit and miss counters
+
+        """
+        self._paths.clear()
+        self._flow_fields.clear()
+        self._pocket_maps.clear()
+        self._damage_maps.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def info(self):
+        """Gets the cache statistics
+
+        Returns:
+            A dict with the number of path hits, misses, the number of paths stored, the maxsize of the cache and the number of flow fields stored
+
+        """
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._paths), "maxsize": self.maxsize,
+                "flow_fields": len(self._flow_fields)}
@@ -1,7 +1,35 @@
 import unittest
 import json
+import random
 from .game_state import GameState
 from .unit import GameUnit
+from .navigation import ShortestPathFinder, FlatPathFinder, ScratchPathFinder, FlowField, PathCache, PathTracker
+from .graph_analysis import find_min_vertex_cut, find_separating_tiles
+from .maze import MazeOptimizer
+from .workers import WorkerPool
+from .benchmarks import run_benchmarks, format_results, VARIANTS
+from .conformance import check_replay
+
+def _replay_lines(game, path, added=None):
+    """A replay of one unit walking path on game's structures, one move per frame.
+    added maps a move number to the location of a wall that is on the board from that move on
+    """
+    added = added or {}
+    walls = [[x, y, 60, str(x * 28 + y)] for x, y in game.game_map if game.contains_stationary_unit([x, y])]
+    def units(move):
+        placed = [[x, y, 60, str(x * 28 + y)] for placed_move, (x, y) in added.items() if placed_move <= move]
+        return [walls + placed, [], [], [], [], [], [], []]
+    #Moves in a frame happen on the structures of the frame before
+    frames = [{"turnInfo": [0, 1, -1], "p1Units": units(0), "p2Units": [[] for _ in range(8)], "events": {}}]
+    for frame, (start, end) in enumerate(zip(path, path[1:])):
+        events = {"move": [[start, end, [0, 0], 3, "1", 1]]}
+        if frame == 0:
+            events["spawn"] = [[path[0], 3, "1", 1]]
+        frames.append({"turnInfo": [1, 1, frame], "p1Units": units(frame + 1), "p2Units": [[] for _ in range(8)], "events": events})
+    return [json.dumps(game.config)] + [json.dumps(frame) for frame in frames]
+
+def _edge_path_lengths(game_state, edge):
+    return [len(path) for path in game_state.find_paths_from_edges([edge]).values()]
 
 class BasicTests(unittest.TestCase):
 
@@ -224,7 +252,42 @@ class BasicTests(unittest.TestCase):
         self.assertEqual(5, game.game_map.distance_between_locations([0, 0], [4, 3]), "The distance between 0,0 and 16,9 should be 5")
         self.assertEqual(0, len(game.game_map.get_locations_in_range([-500,-500], 10)), "Invalid tiles are being marked as in range")
         self.assertEqual(1, len(game.game_map.get_locations_in_range([13,13], 0)), "A location should be in range of itself")
-    
+
+    def test_locations_in_range_stencils(self):
+        game = self.make_turn_0_map()
+        game_map = game.game_map
+        for radius in [0, 1.5, 3.5, 4.5]:
+            for location in [[13, 13], [0, 13], [27, 14], [13, 0], [3, 3]]:
+                expected = []
+                for x in range(location[0] - 5, location[0] + 6):
+                    for y in range(location[1] - 5, location[1] + 6):
+                        if game_map.in_arena_bounds([x, y]) and game_map.distance_between_locations(location, [x, y]) < radius + 0.01:
+                            expected.append([x, y])
+                self.assertEqual(expected, game_map.get_locations_in_range(location, radius), "Wrong locations in {} of {}".format(radius, location))
+        locations = list(game_map)
+        self.assertEqual([game_map.get_locations_in_range(location, 2.5) for location in locations], game_map.get_locations_in_range_batch(locations, 2.5))
+        self.assertEqual(game_map.get_locations_in_range([13, 13], 3.5), game_map.get_locations_in_range([13.0, 13.0], 3.5))
+        self.assertEqual(37, len(game_map.get_locations_in_range([13.0, 13.0], 3.5)))
+        for location in [[13.5, 13.5], [2.5, 13.25]]:
+            expected = [[x, y] for x in range(-5, 33) for y in range(-5, 33)
+                        if game_map.in_arena_bounds([x, y]) and game_map.distance_between_locations(location, [x, y]) < 3 + 0.01]
+            self.assertEqual(sorted(expected), sorted(game_map.get_locations_in_range(location, 3)), "Wrong locations in range of {}".format(location))
+            self.assertEqual([game_map.get_locations_in_range(location, 3)], game_map.get_locations_in_range_batch([location], 3))
+
+    def test_batch_bounds_and_distances(self):
+        game_map = self.make_turn_0_map().game_map
+        locations = [[x, y] for x in range(-2, 30, 3) for y in range(-2, 30, 2)]
+        self.assertEqual([game_map.in_arena_bounds(location) for location in locations], game_map.in_arena_bounds_batch(locations))
+        others = [[0, 0], [27, 27], [13, 13], [-40, 5]]
+        expected = [[game_map.distance_between_locations(location, other) for other in others] for location in locations]
+        self.assertEqual(expected, game_map.distance_matrix(locations, others))
+        self.assertEqual([[0.0, 5.0], [5.0, 0.0]], game_map.distance_matrix([[0, 0], [4, 3]]))
+        float_locations = [[13.0, 0.0], [0.5, 13.0], [13.5, 13.5], [27.0, 14.0], [-1.0, 13.0]]
+        self.assertEqual([game_map.in_arena_bounds(location) for location in float_locations], game_map.in_arena_bounds_batch(float_locations))
+        for locations in [float_locations, [[13.0, 0.0], [4.0, 3.0]]]:
+            expected = [[game_map.distance_between_locations(location, other) for other in others] for location in locations]
+            self.assertEqual(expected, game_map.distance_matrix(locations, others))
+
     def test_get_units(self):
         game = self.make_turn_0_map()
         self.assertEqual(0, len(game.game_map[13,13]), "There should not be a unit on this location")
@@ -275,3 +338,481 @@ class BasicTests(unittest.TestCase):
         actual = game.project_future_MP(turns)
         self.assertAlmostEqual(actual, expected, 0, "Expected {} MP {} turns from now, got {}".format(expected, turns, actual))
 
+    def add_random_walls(self, game, seed, density):
+        rng = random.Random(seed)
+        for location in game.game_map:
+            if rng.random() < density:
+                game.game_map.add_unit("FF", location, 0 if location[1] < game.HALF_ARENA else 1)
+
+    def sample_starts(self, game, seed, count):
+        rng = random.Random(seed)
+        open_locations = [location for location in game.game_map if not game.contains_stationary_unit(location)]
+        return rng.sample(open_locations, min(count, len(open_locations)))
+
+    def test_fast_pathfinders_match_default(self):
+        for seed, density in [(1, 0.0), (2, 0.15), (3, 0.3), (4, 0.45)]:
+            game = self.make_turn_0_map()
+            self.add_random_walls(game, seed, density)
+            default = ShortestPathFinder()
+            for pathfinder in [FlatPathFinder(), ScratchPathFinder()]:
+                for start in self.sample_starts(game, seed, 25):
+                    for edge in range(4):
+                        end_points = game.game_map.get_edge_locations(edge)
+                        expected = default.navigate_multiple_endpoints(start, end_points, game)
+                        got = pathfinder.navigate_multiple_endpoints(start, end_points, game)
+                        self.assertEqual(expected, got, "{} disagrees from {} to edge {}".format(type(pathfinder).__name__, start, edge))
+
+    def test_set_pathfinder(self):
+        game = self.make_turn_0_map()
+        expected = game.find_path_to_edge([13, 0])
+        game.set_pathfinder(FlatPathFinder())
+        self.assertEqual(expected, game.find_path_to_edge([13, 0]), "Selecting the flat pathfinder changed the path")
+
+    def test_blocked_mask(self):
+        game = self.make_turn_0_map()
+        mask = game.game_map.get_blocked_mask()
+        self.assertEqual(0, sum(mask), "An empty map should have no blocked tiles")
+        game.game_map.add_unit("EI", [13, 13])
+        self.assertEqual(0, mask[13 * 28 + 13], "Mobile units should not block")
+        game.game_map.add_unit("FF", [13, 13])
+        self.assertEqual(1, mask[13 * 28 + 13], "Structures should block")
+        game.game_map.remove_unit([13, 13])
+        self.assertEqual(0, mask[13 * 28 + 13], "Removed structures should not block")
+        game.game_map[14, 14] = [GameUnit("DF", game.config, 1, None, 14, 14)]
+        self.assertEqual(1, mask[14 * 28 + 14], "Assigned structures should block")
+
+    def test_map_iteration(self):
+        game = self.make_turn_0_map()
+        game_map = game.game_map
+        locations = list(game_map)
+        self.assertEqual(420, len(locations))
+        self.assertEqual([[13, 0], [14, 0], [12, 1]], locations[:3])
+        self.assertEqual([[13, 27], [14, 27]], locations[-2:])
+        self.assertEqual(420 * 420, sum(1 for _ in game_map for _ in game_map), "Nested iteration should not interfere")
+        first = next(iter(game_map))
+        first.append(1)
+        self.assertEqual([13, 0], next(iter(game_map)), "Each location should be a new list")
+
+        self.assertEqual([location for location in locations if location[1] < 14], list(game_map.iter_my_half()))
+        self.assertEqual([location for location in locations if location[1] >= 14], list(game_map.iter_enemy_half()))
+        game_map.add_unit("FF", [3, 12], 0)
+        game_map.add_unit("DF", [20, 16], 1)
+        game_map.add_unit("PI", [20, 7], 1)
+        self.assertEqual([[3, 12], [20, 16]], list(game_map.iter_structure_locations()))
+        self.assertEqual([[20, 16]], list(game_map.iter_structure_locations(1)))
+        self.assertEqual([[20, 7], [20, 16]], list(game_map.iter_player_locations(1)))
+        self.assertEqual([[3, 12]], list(game_map.iter_player_locations(0)))
+
+    def test_unit_index(self):
+        game = self.make_turn_0_map()
+        turn = json.loads(game.serialized_string)
+        turn["p2Units"] = [[[10, 15, 60.0, "1"], [12, 15, 60.0, "2"]], [], [[20, 16, 40.0, "3"]], [[13, 27, 15.0, "4"], [13, 27, 15.0, "5"]], [], [], [], [[20, 16, 0, "6"]]]
+        game = GameState(game.config, json.dumps(turn))
+        game_map = game.game_map
+        self.assertEqual([[10, 15], [12, 15]], game_map.get_unit_locations(1, "FF"))
+        self.assertEqual([[10, 15], [12, 15], [13, 27], [20, 16]], game_map.get_unit_locations(1))
+        self.assertEqual(2, game_map.count_units(1, "PI"), "Stacked mobile units should each be counted")
+        self.assertEqual(5, game_map.count_units(1))
+        self.assertEqual([], game_map.get_unit_locations(0))
+
+        game_map.add_unit("DF", [10, 15], 1)
+        self.assertEqual([[12, 15]], game_map.get_unit_locations(1, "FF"), "A replaced structure should leave the index")
+        self.assertEqual([[10, 15], [20, 16]], game_map.get_unit_locations(1, "DF"))
+        game_map.remove_unit([13, 27])
+        self.assertEqual(0, game_map.count_units(1, "PI"))
+        game_map[12, 15] = [GameUnit("EF", game.config, 0, None, 12, 15)]
+        self.assertEqual([], game_map.get_unit_locations(1, "FF"))
+        self.assertEqual([[12, 15]], game_map.get_unit_locations(0, "EF"))
+        self.assertEqual(2, game_map.count_units(1))
+
+    def test_structure_arrays(self):
+        game = self.make_turn_0_map()
+        turn = json.loads(game.serialized_string)
+        turn["p1Units"] = [[[3, 12, 60.0, "1"]], [], [[5, 11, 75.0, "2"]], [], [], [], [], [[5, 11, 0, "3"]]]
+        turn["p2Units"] = [[], [], [[20, 16, 40.0, "4"]], [], [], [], [], []]
+        game = GameState(game.config, json.dumps(turn))
+        game_map = game.game_map
+        types = game_map.get_structure_types()
+        owners = game_map.get_structure_owners()
+        health = game_map.get_structure_health()
+        upgraded = game_map.get_structure_upgraded()
+        turret = game_map.get_type_code("DF")
+        self.assertEqual(2, turret)
+        self.assertEqual([game_map.get_type_code("FF"), 0, 60.0, 0], [types[3 * 28 + 12], owners[3 * 28 + 12], health[3 * 28 + 12], upgraded[3 * 28 + 12]])
+        self.assertEqual([turret, 0, 75.0, 1], [types[5 * 28 + 11], owners[5 * 28 + 11], health[5 * 28 + 11], upgraded[5 * 28 + 11]])
+        self.assertEqual([[20, 16]], game_map.get_structure_locations("DF", 1))
+        self.assertEqual([[3, 12], [5, 11], [20, 16]], game_map.get_structure_locations())
+
+        game_map.add_unit("EI", [13, 13])
+        self.assertEqual(-1, types[13 * 28 + 13], "Mobile units are not structures")
+        game_map.add_unit("EF", [13, 13])
+        self.assertEqual([game_map.get_type_code("EF"), 0], [types[13 * 28 + 13], owners[13 * 28 + 13]])
+        game._player_resources[0]["SP"] = 100
+        self.assertEqual(1, game.attempt_upgrade([13, 13]))
+        self.assertEqual(1, upgraded[13 * 28 + 13], "Upgrades should be tracked")
+        game_map.remove_unit([13, 13])
+        self.assertEqual([-1, -1, 0.0, 0], [types[13 * 28 + 13], owners[13 * 28 + 13], health[13 * 28 + 13], upgraded[13 * 28 + 13]])
+        game_map[14, 14] = [GameUnit("DF", game.config, 1, None, 14, 14)]
+        self.assertEqual([turret, 1], [types[14 * 28 + 14], owners[14 * 28 + 14]])
+        game_map[14, 14] = []
+        self.assertEqual(-1, types[14 * 28 + 14])
+        self.assertEqual([[5, 11]], game_map.get_structure_locations("DF", 0))
+
+    def test_path_cache(self):
+        game = self.make_turn_0_map()
+        first = game.find_path_to_edge([13, 0])
+        self.assertEqual(first, game.find_path_to_edge([13, 0]), "Cached path differs from the computed path")
+        self.assertEqual(1, game.path_cache.hits, "Second lookup should hit the cache")
+        self.assertEqual(1, game.path_cache.misses, "First lookup should miss the cache")
+
+        game.attempt_spawn("FF", [[13, 1]])
+        blocked = game.find_path_to_edge([13, 0])
+        self.assertNotIn([13, 1], blocked, "Cached path was not invalidated by attempt_spawn")
+        self.assertEqual(2, game.path_cache.misses, "A new layout should miss the cache")
+        game.game_map.remove_unit([13, 1])
+        self.assertEqual(first, game.find_path_to_edge([13, 0]), "Removing the structure should restore the original path")
+        self.assertEqual(2, game.path_cache.hits, "The original layout should hit the cache again")
+        self.assertEqual(first, game.path_cache.get_path(game.game_map.get_layout_key(), [13, 0], game.get_target_edge([13, 0])))
+        self.assertEqual(2, game.path_cache.hits, "get_path should not count hits, only find_path does")
+
+    def test_path_off_board_with_flow_field(self):
+        game = self.make_turn_0_map()
+        expected = game.find_path_to_edge([0, 0], game.game_map.TOP_RIGHT)
+        game = self.make_turn_0_map()
+        game.get_flow_field(game.game_map.TOP_RIGHT)
+        self.assertEqual(expected, game.find_path_to_edge([0, 0], game.game_map.TOP_RIGHT), "An off board start should not use the flow field")
+        self.assertEqual([[0, 0]], expected)
+
+    def test_flow_field_matches_default(self):
+        for seed, density in [(5, 0.1), (6, 0.35), (7, 0.55)]:
+            game = self.make_turn_0_map()
+            self.add_random_walls(game, seed, density)
+            default = ShortestPathFinder()
+            for edge in range(4):
+                flow_field = game.get_flow_field(edge)
+                end_points = game.game_map.get_edge_locations(edge)
+                for start in self.sample_starts(game, seed, 20):
+                    expected = default.navigate_multiple_endpoints(start, end_points, game)
+                    self.assertEqual(expected, flow_field.get_path(start), "Flow field disagrees from {} to edge {}".format(start, edge))
+                    self.assertEqual(len(expected) - 1, flow_field.get_pathlength(start), "Wrong pathlength from {}".format(start))
+                    self.assertEqual(expected[-1] in end_points, flow_field.reaches_edge(start), "Wrong edge reachability from {}".format(start))
+                self.assertIs(flow_field, game.get_flow_field(edge), "Flow fields should be cached per layout and edge")
+
+    def test_find_paths_from_edges(self):
+        game = self.make_turn_0_map()
+        self.add_random_walls(game, 8, 0.25)
+        edges = [game.game_map.TOP_LEFT, game.game_map.TOP_RIGHT]
+        paths = game.find_paths_from_edges(edges)
+        expected_starts = [tuple(location) for edge in edges for location in game.game_map.get_edge_locations(edge)
+                           if not game.contains_stationary_unit(location)]
+        self.assertEqual(sorted(expected_starts), sorted(paths.keys()), "Batch query should cover every unblocked spawn location")
+        default = ShortestPathFinder()
+        for start, path in paths.items():
+            end_points = game.game_map.get_edge_locations(game.get_target_edge(start))
+            self.assertEqual(default.navigate_multiple_endpoints(list(start), end_points, game), path, "Batch path from {} is wrong".format(start))
+
+    def test_flow_field_repair_matches_rebuild(self):
+        rng = random.Random(9)
+        for density in [0.1, 0.3, 0.5]:
+            game = self.make_turn_0_map()
+            self.add_random_walls(game, rng.randrange(1000), density)
+            edge = rng.randrange(4)
+            end_points = game.game_map.get_edge_locations(edge)
+            flow_field = FlowField(game.game_map.get_layout_key(), end_points)
+            locations = [location for location in game.game_map]
+            for _ in range(20):
+                location = rng.choice(locations)
+                if flow_field.layout_key[location[0] * 28 + location[1]]:
+                    flow_field.unblock(location)
+                else:
+                    flow_field.block(location)
+                rebuilt = FlowField(flow_field.layout_key, end_points)
+                for start in locations:
+                    self.assertEqual(rebuilt.get_path(start), flow_field.get_path(start), "Repaired flow field disagrees from {}".format(start))
+
+    def test_cached_flow_field_is_not_repaired(self):
+        game = self.make_turn_0_map()
+        path = game.find_path_to_edge([13, 0], game.game_map.TOP_RIGHT)
+        flow_field = game.get_flow_field(game.game_map.TOP_RIGHT)
+        with self.assertRaises(ValueError):
+            flow_field.block([13, 1])
+        with self.assertRaises(ValueError):
+            flow_field.unblock([13, 1])
+        self.assertEqual(path, game.find_path_to_edge([13, 0], game.game_map.TOP_RIGHT), "A cached flow field was changed")
+        self.assertIs(flow_field, game.get_flow_field(game.game_map.TOP_RIGHT))
+
+        what_if = flow_field.copy()
+        self.assertTrue(what_if.block([13, 1]), "A copy of a cached flow field should be repairable")
+        self.assertNotEqual(path, what_if.get_path([13, 0]))
+        self.assertEqual(path, game.find_path_to_edge([13, 0], game.game_map.TOP_RIGHT), "Repairing a copy changed the cached flow field")
+
+    def test_pocket_map(self):
+        game = self.make_turn_0_map()
+        self.add_random_walls(game, 10, 0.45)
+        pocket_map = game.get_pocket_map()
+        self.assertIs(pocket_map, game.get_pocket_map(), "Pocket maps should be cached per layout")
+        for edge in range(4):
+            flow_field = FlowField(game.game_map.get_layout_key(), game.game_map.get_edge_locations(edge))
+            for start in game.game_map:
+                self.assertEqual(flow_field.reaches_edge(start), pocket_map.reaches_edge(start, edge), "Wrong edge reachability from {}".format(start))
+                self.assertEqual(flow_field.get_self_destruct_location(start), pocket_map.get_self_destruct_location(start, edge), "Wrong self destruct location from {}".format(start))
+
+    def test_warm_up(self):
+        game = self.make_turn_0_map()
+        path_cache = PathCache()
+        path_cache.warm_up(game.game_map)
+        warm_game = GameState(game.config, game.serialized_string, path_cache)
+        for location in game.game_map.get_edge_locations(game.game_map.BOTTOM_LEFT):
+            self.assertEqual(game.find_path_to_edge(location), warm_game.find_path_to_edge(location), "Warmed up path from {} is wrong".format(location))
+        self.assertEqual(0, path_cache.misses, "Empty board paths from the edges should all be precomputed")
+
+    def test_flow_field_mirror(self):
+        game = self.make_turn_0_map()
+        self.add_random_walls(game, 11, 0.3)
+        for edge in range(4):
+            flow_field = game.get_flow_field(edge)
+            mirrored = flow_field.mirror()
+            mirrored_game = self.make_turn_0_map()
+            for location in game.game_map:
+                if game.contains_stationary_unit(location):
+                    mirrored_game.game_map.add_unit("FF", [27 - location[0], location[1]])
+            self.assertEqual(mirrored_game.game_map.get_layout_key(), mirrored.layout_key, "Mirrored layout key is wrong")
+            expected = mirrored_game.get_flow_field(edge ^ 1)
+            for location in mirrored_game.game_map:
+                self.assertEqual(expected.get_path(location), mirrored.get_path(location), "Mirrored flow field disagrees from {}".format(location))
+
+    def test_mirror_caches(self):
+        game = self.make_turn_0_map()
+        self.add_random_walls(game, 13, 0.3)
+        game.game_map.add_unit("DF", [6, 15], 1)
+        mirrored_game = GameState(game.config, game.serialized_string, game.path_cache)
+        fresh_game = self.make_turn_0_map()
+        for location in game.game_map:
+            for unit in game.game_map[location]:
+                mirrored_location = game.game_map.mirror_location(location)
+                mirrored_game.game_map.add_unit(unit.unit_type, mirrored_location, unit.player_index)
+                fresh_game.game_map.add_unit(unit.unit_type, mirrored_location, unit.player_index)
+        self.assertEqual(mirrored_game.game_map.get_layout_key(), game.game_map.mirror_layout_key())
+        self.assertEqual(game.game_map.TOP_LEFT, game.game_map.mirror_edge(game.game_map.TOP_RIGHT))
+
+        starts = self.sample_starts(game, 13, 30)
+        for start in starts:
+            game.find_path_to_edge(start)
+        hits = game.path_cache.hits
+        for start in starts:
+            mirrored_start = game.game_map.mirror_location(start)
+            self.assertEqual(fresh_game.find_path_to_edge(mirrored_start), mirrored_game.find_path_to_edge(mirrored_start),
+                             "Mirrored path disagrees from {}".format(mirrored_start))
+        self.assertGreater(game.path_cache.hits, hits, "Expected some paths to be mirrored from the cache")
+
+        damage_map = game.get_damage_map(0)
+        self.assertIs(damage_map, game.path_cache.get_damage_map(0, damage_map.attackers))
+        mirrored_damage_map = mirrored_game.get_damage_map(0)
+        self.assertIsNot(damage_map, mirrored_damage_map)
+        fresh_damage_map = fresh_game.get_damage_map(0)
+        self.assertEqual(fresh_damage_map.attackers, mirrored_damage_map.attackers)
+        self.assertEqual(fresh_damage_map.damage, mirrored_damage_map.damage)
+        self.assertEqual(fresh_damage_map.attacker_counts, mirrored_damage_map.attacker_counts)
+
+    def test_path_cache_reuse_across_turns(self):
+        game = self.make_turn_0_map()
+        path_cache = PathCache()
+        first_turn = GameState(game.config, game.serialized_string, path_cache)
+        self.add_random_walls(first_turn, 12, 0.2)
+        first_turn.get_flow_field(first_turn.game_map.TOP_RIGHT)
+        next_turn = GameState(game.config, game.serialized_string, path_cache)
+        self.add_random_walls(next_turn, 12, 0.2)
+        self.assertIs(first_turn.get_flow_field(first_turn.game_map.TOP_RIGHT), next_turn.get_flow_field(next_turn.game_map.TOP_RIGHT),
+                      "A repeated layout should reuse the flow field from the previous turn")
+
+    def test_path_traffic(self):
+        game = self.make_turn_0_map()
+        self.add_random_walls(game, 13, 0.25)
+        traffic = game.get_path_traffic(1)
+        expected = [[0] * 28 for _ in range(28)]
+        for edge in [game.game_map.TOP_LEFT, game.game_map.TOP_RIGHT]:
+            for location in game.game_map.get_edge_locations(edge):
+                if not game.contains_stationary_unit(location):
+                    for x, y in game.find_path_to_edge(location):
+                        expected[x][y] += 1
+        self.assertEqual(expected, traffic, "Traffic map does not match the individual enemy paths")
+
+    def test_chokepoints(self):
+        game = self.make_turn_0_map()
+        for x in range(28):
+            if x != 13:
+                game.game_map.add_unit("FF", [x, 13], 0)
+        chokepoints = game.find_chokepoints(0)
+        for edge in [game.game_map.TOP_LEFT, game.game_map.TOP_RIGHT]:
+            self.assertEqual([[13, 13]], chokepoints[edge]["min_cut"], "The gap in the wall should be the min cut")
+            self.assertEqual([[13, 12], [13, 13], [13, 14]], chokepoints[edge]["separating"], "Only the gap and the tiles on either side of it should be separating")
+
+        for seed in range(3):
+            game = self.make_turn_0_map()
+            self.add_random_walls(game, seed, 0.3)
+            sources = game.game_map.get_edge_locations(game.game_map.TOP_LEFT)
+            sinks = game.game_map.get_edge_locations(game.game_map.BOTTOM_RIGHT)
+            cut = find_min_vertex_cut(game.game_map, sources, sinks)
+            for location in cut:
+                game.game_map.add_unit("FF", location, 0 if location[1] < game.HALF_ARENA else 1)
+            pocket_map = game.get_pocket_map()
+            for location in sources:
+                if not game.contains_stationary_unit(location):
+                    self.assertFalse(pocket_map.reaches_edge(location, game.game_map.BOTTOM_RIGHT), "Blocking the min cut should cut off {}".format(location))
+            self.assertEqual([], find_separating_tiles(game.game_map, sources, sinks), "Sources cut off from the sinks have no separating tiles")
+
+    def test_maze_optimizer(self):
+        game = self.make_turn_0_map()
+        self.add_random_walls(game, 14, 0.05)
+        optimizer = MazeOptimizer(game, sp_budget=12, time_budget=0.3, seed=14)
+        placement = optimizer.optimize()
+        self.assertLessEqual(len(placement), 12, "Placement is over the SP budget")
+        for location in placement:
+            self.assertLess(location[1], game.HALF_ARENA, "Structures must be placed on our half")
+            game.game_map.add_unit("FF", location, 0)
+        pathlengths = []
+        for edge in [game.game_map.TOP_LEFT, game.game_map.TOP_RIGHT]:
+            for location in game.game_map.get_edge_locations(edge):
+                if not game.contains_stationary_unit(location):
+                    pathlengths.append(len(game.find_path_to_edge(location)))
+        self.assertAlmostEqual(sum(pathlengths) / len(pathlengths), optimizer.best_score, 9, "Best score does not match the enemy paths for the placement")
+
+    def test_timed_paths(self):
+        game = self.make_turn_0_map()
+        self.add_random_walls(game, 15, 0.2)
+        config = game.config
+        units = [GameUnit("PI", config, 0, None, 13, 0), GameUnit("EI", config, 0, None, 13, 0), GameUnit("SI", config, 0, None, 3, 10)]
+        upgraded = GameUnit("EI", config, 0, None, 13, 0)
+        upgraded.upgrade()
+        units.append(upgraded)
+        timed_paths = game.find_timed_paths(units)
+        for unit, timed_path in zip(units, timed_paths):
+            self.assertEqual(game.find_timed_path_to_edge(unit), timed_path, "Batch timed path does not match the single unit version")
+            self.assertEqual(game.find_path_to_edge([unit.x, unit.y]), [step[0] for step in timed_path], "Timed path visits different tiles")
+            frames_per_move = round(1 / unit.speed)
+            for i, (location, arrival, departure) in enumerate(timed_path):
+                self.assertEqual(i * frames_per_move, arrival, "Wrong arrival frame for {}".format(unit.unit_type))
+                self.assertEqual(arrival + frames_per_move, departure, "Wrong departure frame for {}".format(unit.unit_type))
+        self.assertIsNone(game.find_timed_paths([GameUnit("FF", config, 0, None, 13, 0)])[0], "Structures do not move")
+
+    def test_damage_map(self):
+        game = self.make_turn_0_map()
+        rng = random.Random(16)
+        for location in game.game_map:
+            roll = rng.random()
+            if roll < 0.08:
+                game.game_map.add_unit("DF", location, rng.randrange(2))
+                if roll < 0.03:
+                    game.game_map[location][0].upgrade()
+            elif roll < 0.12:
+                game.game_map.add_unit("EF", location, rng.randrange(2))
+        for player_index in [0, 1]:
+            damage_map = game.get_damage_map(player_index)
+            for location in game.game_map:
+                attackers = game.get_attackers(location, player_index)
+                self.assertEqual(len(attackers), damage_map.get_attacker_count(location), "Attacker count disagrees at {}".format(location))
+                self.assertEqual(sum(unit.damage_i for unit in attackers), damage_map.get_damage(location), "Damage disagrees at {}".format(location))
+        self.assertIs(damage_map, game.get_damage_map(1), "An unchanged layout should reuse the damage map")
+
+        path = game.find_path_to_edge([13, 0])
+        expected = sum(damage_map.get_damage(location) for location in path)
+        self.assertEqual(expected * 2, damage_map.score_path(path, 2), "Path damage should scale with the frames spent on each tile")
+        unit = GameUnit("EI", game.config, 1, None, 13, 0)
+        self.assertEqual(expected * 2, damage_map.score_timed_path(game.find_timed_path_to_edge(unit)), "Timed path damage disagrees")
+
+    def test_worker_pool(self):
+        boards = []
+        for seed in range(3):
+            game = self.make_turn_0_map()
+            self.add_random_walls(game, seed, 0.2)
+            boards.append(game)
+        boards.append(game.serialized_string)
+        pool = WorkerPool(game.config, 2)
+        try:
+            results = pool.map(_edge_path_lengths, boards, game.game_map.BOTTOM_LEFT)
+        finally:
+            pool.close()
+        for board, result in zip(boards, results):
+            if isinstance(board, str):
+                board = self.make_turn_0_map()
+            self.assertEqual(_edge_path_lengths(board, board.game_map.BOTTOM_LEFT), result, "Worker result does not match the local board")
+
+    def test_path_tracker(self):
+        game = self.make_turn_0_map()
+        self.add_random_walls(game, 17, 0.3)
+        tracker = PathTracker(game)
+        starts = [location for location in game.game_map.get_edge_locations(game.game_map.BOTTOM_LEFT) if not game.contains_stationary_unit(location)]
+        for unit_id, location in enumerate(starts):
+            tracker.track(unit_id, location)
+            path = tracker.get_path(unit_id)
+            if len(path) > 3:
+                tracker.advance(unit_id, path[3])
+        walls = [location for location in game.game_map if game.contains_stationary_unit(location)]
+        rerouted = 0
+        for wall in random.Random(17).sample(walls, 15):
+            game.game_map.remove_unit(wall)
+            rerouted += len(tracker.rerouted)
+            layout_key = game.game_map.get_layout_key()
+            flow_field = FlowField(layout_key, game.game_map.get_edge_locations(game.game_map.TOP_RIGHT))
+            for unit_id in range(len(starts)):
+                path = tracker.get_path(unit_id)
+                self.assertEqual(flow_field.get_path(path[0], tracker._last_move_direction(tracker._units[unit_id])), path,
+                                 "Tracked path is out of date after removing {}".format(wall))
+        self.assertGreater(rerouted, 0, "Removing walls should reroute some units")
+        tracker.close()
+        rerouted = tracker.rerouted
+        game.game_map.remove_unit([location for location in walls if game.contains_stationary_unit(location)][0])
+        self.assertIs(rerouted, tracker.rerouted, "A closed tracker should not react to changes")
+
+    def test_benchmarks(self):
+        config = self.make_turn_0_map().config
+        results = run_benchmarks(config, densities=[0.0, 0.5], boards=1, starts=2, variants=["scratch_path_finder", "find_path_to_edge_cached"])
+        self.assertEqual(4, len(results), "Expected a result for each variant and density")
+        for result in results:
+            self.assertEqual(2, result["calls"], "Expected a call for each start")
+            self.assertTrue(result["p50"] <= result["p90"] <= result["p99"] <= result["max"], "Percentiles are out of order")
+            self.assertIsNotNone(result["mean_bytes"], "Allocations were not measured")
+        self.assertIn("scratch_path_finder", format_results(results))
+        results = run_benchmarks(config, densities=[0.3], boards=1, starts=1, measure_allocations=False)
+        self.assertEqual(sorted(VARIANTS), sorted(result["variant"] for result in results), "Every variant should run")
+
+    def test_conformance(self):
+        game = self.make_turn_0_map()
+        self.add_random_walls(game, 19, 0.3)
+        start = [location for location in game.game_map.get_edge_locations(game.game_map.BOTTOM_LEFT) if not game.contains_stationary_unit(location)][0]
+        path = game.find_path_to_edge(start)
+        lines = _replay_lines(game, path)
+        report = check_replay(lines, ScratchPathFinder())
+        self.assertEqual(len(path) - 1, report.moves_checked, "Expected every move to be checked")
+        self.assertEqual([], report.mismatches, "The pathfinder should predict its own path")
+        self.assertEqual(1, report.paths_computed, "A path should be reused while the structures do not change")
+
+        wrong = json.loads(lines[3])
+        wrong["events"]["move"][0][1] = wrong["events"]["move"][0][0]
+        lines[3] = json.dumps(wrong)
+        report = check_replay(lines)
+        self.assertEqual(1, len(report.mismatches), "Expected the altered move to mismatch")
+        self.assertEqual(1, report.mismatches[0]["frame"])
+
+    def test_conformance_structure_change(self):
+        game = self.make_turn_0_map()
+        self.add_random_walls(game, 0, 0.15)
+        path = game.find_path_to_edge([13, 0])
+        #A wall placed ahead of the unit after 7 moves, where the tie breaking of its new path depends on its last move
+        wall = path[9]
+        tracker = PathTracker(game)
+        tracker.track("1", path[0])
+        for location in path[1:8]:
+            tracker.advance("1", location)
+        game.game_map.add_unit("FF", wall, 0)
+        walked = path[:7] + tracker.get_path("1")
+        fresh = ScratchPathFinder().navigate_multiple_endpoints(path[7], game.game_map.get_edge_locations(game.game_map.TOP_RIGHT), game)
+        self.assertNotEqual(fresh, tracker.get_path("1"), "The last move should change the new path")
+        game.game_map.remove_unit(wall)
+
+        lines = _replay_lines(game, walked, {7: wall})
+        for pathfinder in [ShortestPathFinder(), ScratchPathFinder()]:
+            report = check_replay(lines, pathfinder)
+            self.assertEqual(len(walked) - 1, report.moves_checked)
+            self.assertEqual([], report.mismatches, "Paths found again should agree with PathTracker")
+            self.assertEqual(2, report.paths_computed, "The path should be found again once, when the wall is placed")
@@ -0,0 +1,115 @@
+"""
+A pool of worker processes that lives for the whole game, so heavy searches can use every core without paying
+to start processes during a turn. See AlgoCore.start_worker_pool.
+"""
+
+import multiprocessing
+
+from .game_state import GameState, EMPTY_TURN
+from .game_map import GameMap
+from .navigation import PathCache
+from .unit import GameUnit
+
+#Set in each worker process by _initialize_worker
+_worker_config = None
+_worker_path_cache = None
+
+def _initialize_worker(config):
+    """Runs once in each worker process when the pool starts, so jobs only pay for building their GameState
+
+    """
+    global _worker_config, _worker_path_cache
+    _worker_config = config
+    _worker_path_cache = PathCache()
+    #Building a GameState sets the unit type constants GameUnit relies on
+    GameState(config, EMPTY_TURN, _worker_path_cache)
+    _worker_path_cache.warm_up(GameMap(config))
+
+def _run_job(job):
+    """Rebuilds the board for a job in a worker process and calls the job's function on it
+
+    """
+    function, turn_string, structures, resources, args = job
+    game_state = GameState(_worker_config, turn_string, _worker_path_cache)
+    game_state.suppress_warnings(True)
+    if structures is not None:
+        _restore_structures(game_state, structures)
+        game_state._player_resources = resources
+    return function(game_state, *args)
+
+def _snapshot_structures(game_state):
+    """The structures on a GameState's map, including any added or removed since it was parsed
+
+    """
+    structures = []
+    for location in game_state.game_map.iter_structure_locations():
+        for unit in game_state.game_map[location]:
+            if unit.stationary:
+                structures.append((unit.unit_type, unit.x, unit.y, unit.player_index, unit.health, unit.upgraded, unit.pending_removal))
+    return structures
+
+def _restore_structures(game_state, structures):
+    """Replaces the structures on a GameState's map with ones from _snapshot_structures
+
+    """
+    game_map = game_state.game_map
+    for location in game_map.iter_structure_locations():
+        game_map.remove_unit(location)
+    for unit_type, x, y, player_index, health, upgraded, pending_removal in structures:
+        unit = GameUnit(unit_type, game_state.config, player_index, None, x, y)
+        if upgraded:
+            unit.upgrade()
+        unit.health = health
+        unit.pending_removal = pending_removal
+        game_map._place_unit(unit)
+
+
+class WorkerPool:
+    """A process pool whose workers are loaded with the game config, the unit type constants and a warmed up PathCache.
+
+    Jobs are functions called as function(game_state, *args) in a worker, where game_state is a rebuilt copy of one
+    board. Functions and their arguments are sent to the workers by pickling, so functions must be defined at the
+    top level of a module, and only their return values come back.
+
+    Attributes :
+        * processes (int): The number of worker processes
+
+    """
+    def __init__(self, config, processes=None):
+        """Starts the worker processes
+
+        Args:
+            * config (JSON): A json object containing information about the game
+            * processes: The number of worker processes, the number of cores if None
+
+        """
+        self.processes = processes if processes is not None else multiprocessing.cpu_count()
+        self._pool = multiprocessing.Pool(self.processes, initializer=_initialize_worker, initargs=(config,))
+
+    def map(self, function, boards, *args):
+        """Calls function(game_state, *args) for each board, spread across the workers
+
+        Args:
+            * function: A top level function taking a GameState, such as one that scores a hypothetical defence
+            * boards: A list of serialized game states, or of GameStates. The structures on a GameState's map are sent,
+              so boards made by adding or removing structures with game_map.add_unit, attempt_spawn etc. are evaluated as they are
+            * args: Extra arguments passed to every call
+
+        Returns:
+            A list of the return values, in the same order as boards
+
+        """
+        jobs = []
+        for board in boards:
+            if isinstance(board, str):
+                jobs.append((function, board, None, None, args))
+            else:
+                jobs.append((function, board.serialized_string, _snapshot_structures(board), board._player_resources, args))
+        return self._pool.map(_run_job, jobs)
+
+    def close(self):
+        """Stops the worker processes
+
+        """
+        self._pool.terminate()
+        self._pool.join()